@@ -0,0 +1,39 @@
+from abc import ABC, abstractmethod
+
+
+class AsyncGeneralAPI(ABC):
+    """Abstract class for working with the API asynchronously"""
+
+    @abstractmethod
+    async def get_vacancies(self, name: str, salary: int, quantity: int) -> dict:
+        """
+        Fetches job vacancies from the API without blocking the event loop.
+
+        :param name: Name of the job vacancy.
+        :param salary: Desired salary for the vacancy.
+        :param quantity: Number of vacancies to retrieve.
+        :return: Dictionary containing job vacancy data.
+        """
+        pass
+
+    @abstractmethod
+    def parse(self, data: dict) -> list:
+        """
+        Parses raw API data into a structured format.
+
+        :param data: Raw data from the API.
+        :return: List of parsed and structured Vacancy objects.
+        """
+        pass
+
+    @abstractmethod
+    async def search(self, name: str, salary: int, quantity: int) -> list:
+        """
+        Fetches job vacancies from the API and parses them.
+
+        :param name: Name of the job vacancy.
+        :param salary: Desired salary for the vacancy.
+        :param quantity: Number of vacancies to retrieve.
+        :return: List of parsed and structured Vacancy objects.
+        """
+        pass
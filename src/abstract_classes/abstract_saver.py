@@ -14,7 +14,7 @@ class GeneralStorage(ABC):
             get_vacancies_by_salary(self, criteria): Abstract method to retrieve vacancies based on salary criteria.
             get_vacancies_by_city(self, city_criteria): Abstract method to retrieve vacancies based on city criteria.
             delete_vacancy(self, remove_criteria): Abstract method to delete a vacancy based on criteria.
-            top_vacancies(self, top_number): Abstract method to retrieve the top N vacancies.
+            top_vacancies(self, top_number, key): Abstract method to retrieve the top N vacancies ranked by salary.
     """
 
     @abstractmethod
@@ -67,12 +67,13 @@ class GeneralStorage(ABC):
         pass
 
     @abstractmethod
-    def top_vacancies(self, top_number):
+    def top_vacancies(self, top_number, key='average'):
         """
-        Retrieves the top N vacancies.
+        Retrieves the top N vacancies ranked by salary.
         This method should be implemented by subclasses to define how the top vacancies are retrieved.
 
         Args:
             top_number: The number of top N vacancies to retrieve.
+            key: Salary to rank by: 'average', 'salary_from' or 'salary_to'.
         """
         pass
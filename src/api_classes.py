@@ -1,33 +1,336 @@
+import math
 import os
+import time
+from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Iterator
 
 import requests
 
 from src.abstract_classes.abstract_api import GeneralAPI
+from src.crawl_state import CrawlState
+from src.http_cache import ResponseCache, get_default_cache
+from src.http_session import get_default_session
 from src.models.vacancy import Vacancy
+from src.rate_limiter import RETRY_STATUS_CODES, RetryPolicy, TokenBucket, get_rate_limiter
+from src.salary_normalizer import SalaryNormalizer, get_default_normalizer
 
 API_KEY = os.getenv('SJ_API_KEY')
 
 
-class HeadHunterAPI(GeneralAPI):
+class APIError(Exception):
+    """
+    Raised when a request to a platform API fails after all retries.
+    """
+
+    def __init__(self, platform: str, status_code: int, message: str) -> None:
+        """
+        Initializes the error.
+
+        :param platform: Name of the platform.
+        :param status_code: Status code of the last response, 0 if the platform could not be reached.
+        :param message: Description of the failure.
+        """
+        reason = f'HTTP {status_code}' if status_code else 'no response'
+        super().__init__(f'{platform}: {message} ({reason})')
+        self.platform = platform
+        self.status_code = status_code
+
+
+class PlatformAPI(GeneralAPI):
+    """
+    Base implementation of the GeneralAPI class with the HTTP layer shared by the platform APIs:
+    a pooled session, an on-disk response cache, a rate limiter and retries with backoff.
+    """
+
+    # Time in seconds during which a cached response is served without asking the platform
+    CACHE_TTL = 15 * 60
+    # Sustained requests per second and burst size allowed by the platform
+    RATE_LIMIT = 5.0
+    RATE_BURST = 5
+    # Time in seconds to wait for the platform to respond
+    REQUEST_TIMEOUT = 30
+    # Name of the platform and the key of the vacancy list in its responses
+    PLATFORM = None
+    ITEMS_KEY = None
+    # Maximum number of vacancies per page and per search
+    MAX_PER_PAGE = 100
+    MAX_DEPTH = 2000
+    # Messages printed for failed requests by status code
+    ERROR_MESSAGES = {400: 'bad request', 403: 'access forbidden', 404: 'not found', 429: 'too many requests'}
+
+    def __init__(self, base_url: str, session: requests.Session = None, cache: ResponseCache = None,
+                 use_cache: bool = True, cache_ttl: float = None, rate_limiter: TokenBucket = None,
+                 retry_policy: RetryPolicy = None, normalizer: SalaryNormalizer = None) -> None:
+        """
+        Initializes the platform API instance.
+
+        :param base_url: Base URL of the platform API.
+        :param session: HTTP session used for requests, the shared pooled session by default.
+        :param cache: Response cache, the shared on-disk cache by default.
+        :param use_cache: Whether responses are cached at all.
+        :param cache_ttl: Time to live of cached responses in seconds, CACHE_TTL of the platform by default.
+        :param rate_limiter: Token bucket limiting the requests, shared by all instances of the platform by default.
+        :param retry_policy: Schedule of retries of throttled and failed requests.
+        :param normalizer: Converter of salaries to net roubles, the shared one by default.
+        """
+        self._base_url = base_url
+        self._session = session or get_default_session()
+        self._cache = (cache or get_default_cache()) if use_cache else None
+        self.cache_ttl = self.CACHE_TTL if cache_ttl is None else cache_ttl
+        self._rate_limiter = rate_limiter or get_rate_limiter(self.PLATFORM, self.RATE_LIMIT, self.RATE_BURST)
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._normalizer = normalizer or get_default_normalizer()
+
+    def _fetch(self, url: str, headers: dict, params: dict) -> tuple[int, dict]:
+        """
+        Performs a GET request, serving it from the cache when possible.
+        Stale cache entries are revalidated with ETag/If-Modified-Since.
+        The currency rates are loaded before the first request, so parsing the pages never waits on the network.
+
+        :param url: Request URL.
+        :param headers: Request headers.
+        :param params: Request query parameters.
+        :return: Tuple of the response status code and the decoded JSON body (None for failed requests).
+        """
+        self._normalizer.load_rates()
+        entry = None
+        if self._cache is not None:
+            entry, fresh = self._cache.lookup(url, params, self.cache_ttl)
+            if fresh:
+                return 200, entry['data']
+            if entry is not None:
+                headers = dict(headers)
+                if entry.get('etag'):
+                    headers['If-None-Match'] = entry['etag']
+                if entry.get('last_modified'):
+                    headers['If-Modified-Since'] = entry['last_modified']
+
+        response = self._send(url, headers, params)
+        if response is None:
+            return 0, None
+
+        if response.status_code == 304 and entry is not None:
+            self._cache.revalidate(url, params, entry)
+            return 200, entry['data']
+        if response.status_code != 200:
+            return response.status_code, None
+
+        data = response.json()
+        if self._cache is not None:
+            self._cache.store(url, params, data, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return 200, data
+
+    def _result(self, status_code: int, data: dict, raise_errors: bool = False) -> dict:
+        """
+        Returns the data of a successful request and reports a failed one.
+
+        :param status_code: Status code returned by _fetch.
+        :param data: Decoded JSON body returned by _fetch.
+        :param raise_errors: Whether a failure raises APIError instead of printing a message.
+        :return: The data or None if the request failed.
+        """
+        if status_code == 200:
+            return data
+        message = self.ERROR_MESSAGES.get(status_code, 'unknown error')
+        if raise_errors:
+            raise APIError(self.PLATFORM, status_code, message)
+        print(message)
+
+    def _send(self, url: str, headers: dict, params: dict):
+        """
+        Performs a GET request within the rate limit of the platform.
+        Throttled (429), failed (5xx) and timed out requests are retried with jittered exponential backoff,
+        the Retry-After header also pauses the other requests to the platform.
+
+        :param url: Request URL.
+        :param headers: Request headers.
+        :param params: Request query parameters.
+        :return: Response of the last attempt or None if the platform could not be reached.
+        """
+        attempt = 0
+        while True:
+            self._rate_limiter.acquire()
+            try:
+                response = self._session.get(url, headers=headers, params=params, timeout=self.REQUEST_TIMEOUT)
+            except (requests.ConnectionError, requests.Timeout):
+                response = None
+            else:
+                if response.status_code not in RETRY_STATUS_CODES:
+                    return response
+
+            if attempt >= self._retry_policy.max_retries:
+                return response
+
+            retry_after = response.headers.get('Retry-After') if response is not None else None
+            delay = self._retry_policy.delay(attempt, retry_after)
+            if retry_after:
+                # The next acquire waits out the pause together with the other requests to the platform
+                self._rate_limiter.pause(delay)
+            else:
+                time.sleep(delay)
+            attempt += 1
+
+    @abstractmethod
+    def iter_parse(self, data: dict) -> Iterator[Vacancy]:
+        """
+        Parses raw API data one vacancy at a time.
+
+        :param data: Raw data from the API.
+        :return: Generator of parsed and structured Vacancy objects.
+        """
+        pass
+
+    def iter_vacancies(self, name: str, salary: int = None, quantity: int = None,
+                       per_page: int = None) -> Iterator[Vacancy]:
+        """
+        Fetches and parses job vacancies lazily, page by page.
+        The next page is requested only when the vacancies of the previous one have been consumed,
+        so only one page of raw data is held in memory at a time.
+
+        :param name: Name of the job vacancy.
+        :param salary: Desired salary for the vacancy.
+        :param quantity: Number of vacancies to retrieve, all available vacancies if None.
+        :param per_page: Number of vacancies requested per page.
+        :return: Generator of parsed and structured Vacancy objects.
+        :raises APIError: If a page could not be fetched.
+        """
+        per_page = min(per_page or self.MAX_PER_PAGE, self.MAX_PER_PAGE)
+        quantity = min(quantity or self.MAX_DEPTH, self.MAX_DEPTH)
+        page = 0
+        remaining = quantity
+
+        while remaining > 0:
+            data = self.get_vacancies(name, salary, per_page, page=page, raise_errors=True)
+            items_count = len(data[self.ITEMS_KEY])
+
+            for vacancy in self.iter_parse(data):
+                yield vacancy
+                remaining -= 1
+                if remaining == 0:
+                    return
+
+            if items_count < per_page:
+                return
+            page += 1
+
+    @abstractmethod
+    def get_vacancies_since(self, name: str, salary: int, quantity: int, since: float, page: int = None) -> dict:
+        """
+        Fetches job vacancies published after the given moment, newest first.
+
+        :param name: Name of the job vacancy.
+        :param salary: Desired salary for the vacancy.
+        :param quantity: Number of vacancies to retrieve.
+        :param since: Unix timestamp of the earliest publication time.
+        :param page: Number of the results page to retrieve, starting from 0.
+        :return: Dictionary containing job vacancy data.
+        """
+        pass
+
+    @abstractmethod
+    def item_timestamp(self, item: dict) -> float:
+        """
+        Returns the publication time of a raw vacancy.
+
+        :param item: Raw vacancy data from the API.
+        :return: Unix timestamp of the publication.
+        """
+        pass
+
+    def get_new_vacancies(self, name: str, salary: int = None, quantity: int = None,
+                          state: CrawlState = None) -> dict:
+        """
+        Fetches only the job vacancies published since the previous run of the same query.
+        The first run fetches the usual result set. Later runs page through the vacancies published since
+        the previous run, newest first, until they reach it, so none of them is skipped whatever the quantity
+        (up to MAX_DEPTH, the deepest the platform search goes).
+        The high-water mark is not moved here: call commit_new_vacancies once the vacancies are stored.
+
+        :param name: Name of the job vacancy.
+        :param salary: Desired salary for the vacancy.
+        :param quantity: Number of vacancies to retrieve on the first run.
+        :param state: Storage of the high-water marks, the default state file if None.
+        :return: Dictionary containing only new job vacancy data, None if the platform could not be reached.
+        """
+        state = state or CrawlState()
+        mark = state.get_mark(state.make_key(self.PLATFORM, name, salary))
+        if mark is None:
+            return self.get_vacancies(name, salary, quantity)
+
+        new_items = []
+        page = 0
+        while True:
+            data = self.get_vacancies_since(name, salary, self.MAX_PER_PAGE, mark, page=page)
+            if data is None:
+                return None
+            items = data[self.ITEMS_KEY]
+            fresh_items = [item for item in items if self.item_timestamp(item) > mark]
+            new_items += fresh_items
+            # The pages go from the newest vacancy to the oldest, so an old vacancy means the mark is reached
+            if (len(fresh_items) < len(items) or len(items) < self.MAX_PER_PAGE
+                    or (page + 1) * self.MAX_PER_PAGE >= self.MAX_DEPTH):
+                break
+            page += 1
+
+        new_data = dict(data)
+        new_data[self.ITEMS_KEY] = new_items
+        return new_data
+
+    def commit_new_vacancies(self, name: str, salary: int, data: dict, state: CrawlState = None) -> None:
+        """
+        Moves the high-water mark of a query to the newest of the vacancies returned by get_new_vacancies.
+        Call it after the vacancies have been stored, so that a failed run fetches them again.
+
+        :param name: Name of the job vacancy.
+        :param salary: Desired salary for the vacancy.
+        :param data: Dictionary returned by get_new_vacancies.
+        :param state: Storage of the high-water marks, the default state file if None.
+        """
+        if not data or not data[self.ITEMS_KEY]:
+            return
+        state = state or CrawlState()
+        newest = max(self.item_timestamp(item) for item in data[self.ITEMS_KEY])
+        state.set_mark(state.make_key(self.PLATFORM, name, salary), newest)
+
+
+class HeadHunterAPI(PlatformAPI):
     """
     Implementation of the GeneralAPI class for interacting with the HeadHunter job vacancies API.
     """
 
-    def __init__(self) -> None:
+    PLATFORM = 'HeadHunter'
+    ITEMS_KEY = 'items'
+    RATE_LIMIT = 7.0
+    RATE_BURST = 10
+    # HeadHunter returns at most 100 vacancies per page and at most 2000 vacancies per search
+    MAX_PER_PAGE = 100
+    MAX_DEPTH = 2000
+
+    def __init__(self, max_workers: int = 4, **kwargs) -> None:
         """
         Initializes the HeadHunter API instance.
         Initializes the base URL for the HeadHunter API.
+
+        :param max_workers: Maximum number of page requests in flight during a paginated fetch.
+        :param kwargs: HTTP layer options of PlatformAPI (session, cache, use_cache, cache_ttl).
         """
-        self._base_url = 'https://api.hh.ru/'
+        super().__init__('https://api.hh.ru/', **kwargs)
+        self.max_workers = max_workers
 
-    def get_vacancies(self, name: str, salary: int = None, quantity: int = None) -> dict:
+    def get_vacancies(self, name: str, salary: int = None, quantity: int = None, page: int = None,
+                      date_from: str = None, raise_errors: bool = False) -> dict:
         """
         Fetches job vacancies from the HeadHunter API.
 
         :param name: Name of the job vacancy.
         :param salary: Desired salary for the vacancy.
         :param quantity: Number of vacancies to retrieve.
-        :return: Dictionary containing job vacancy data.
+        :param page: Number of the results page to retrieve, starting from 0.
+        :param date_from: ISO 8601 date, only vacancies published after it are returned, newest first.
+        :param raise_errors: Whether a failed request raises APIError instead of printing a message.
+        :return: Dictionary containing job vacancy data, None if the request failed.
         """
 
         url = f'{self._base_url}vacancies'
@@ -38,21 +341,75 @@ class HeadHunterAPI(GeneralAPI):
             'text': f'name:{name}',
             'salary': salary,
             'per_page': quantity,
+            'page': page,
+            'date_from': date_from,
+            'order_by': 'publication_time' if date_from else None,
         }
 
-        response = requests.get(url, headers=headers, params=params)
+        status_code, data = self._fetch(url, headers, params)
+        return self._result(status_code, data, raise_errors)
 
-        if response.status_code == 200:
-            data = response.json()
-            return data
-        elif response.status_code == 400:
-            print('bad request')
-        elif response.status_code == 403:
-            print('access forbidden')
-        elif response.status_code == 404:
-            print('not found')
-        else:
-            print('unknown error')
+    def get_vacancies_paginated(self, name: str, salary: int = None, quantity: int = None,
+                                per_page: int = MAX_PER_PAGE) -> dict:
+        """
+        Fetches job vacancies from the HeadHunter API page by page.
+        The first page is requested to learn the number of available pages,
+        the rest are fetched concurrently with at most max_workers requests in flight.
+
+        :param name: Name of the job vacancy.
+        :param salary: Desired salary for the vacancy.
+        :param quantity: Number of vacancies to retrieve, all available vacancies if None.
+        :param per_page: Number of vacancies requested per page.
+        :return: Dictionary containing job vacancy data with items of all fetched pages.
+        :raises APIError: If a page could not be fetched, so the result is never silently truncated.
+        """
+        quantity = min(quantity or self.MAX_DEPTH, self.MAX_DEPTH)
+        per_page = min(per_page, self.MAX_PER_PAGE, quantity)
+
+        first_page = self.get_vacancies(name, salary, per_page, page=0, raise_errors=True)
+        pages_total = min(first_page['pages'], math.ceil(quantity / per_page))
+        items = list(first_page['items'])
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pages = executor.map(lambda page: self.get_vacancies(name, salary, per_page, page=page, raise_errors=True),
+                                 range(1, pages_total))
+            try:
+                for data in pages:
+                    items.extend(data['items'])
+            except APIError:
+                # The pages not requested yet are of no use without the failed one
+                executor.shutdown(cancel_futures=True)
+                raise
+
+        merged = dict(first_page)
+        merged['items'] = items[:quantity]
+        merged['page'] = 0
+        merged['pages'] = pages_total
+        merged['per_page'] = len(merged['items'])
+        return merged
+
+    def get_vacancies_since(self, name: str, salary: int, quantity: int, since: float, page: int = None) -> dict:
+        """
+        Fetches job vacancies published on HeadHunter after the given moment, newest first.
+
+        :param name: Name of the job vacancy.
+        :param salary: Desired salary for the vacancy.
+        :param quantity: Number of vacancies to retrieve.
+        :param since: Unix timestamp of the earliest publication time.
+        :param page: Number of the results page to retrieve, starting from 0.
+        :return: Dictionary containing job vacancy data.
+        """
+        date_from = datetime.fromtimestamp(since, tz=timezone.utc).isoformat(timespec='seconds')
+        return self.get_vacancies(name, salary, quantity, page=page, date_from=date_from)
+
+    def item_timestamp(self, item: dict) -> float:
+        """
+        Returns the publication time of a raw HeadHunter vacancy.
+
+        :param item: Raw vacancy data from the API.
+        :return: Unix timestamp of the publication.
+        """
+        return datetime.fromisoformat(item['published_at']).timestamp()
 
     def parse(self, data: dict) -> list[Vacancy]:
         """
@@ -61,47 +418,80 @@ class HeadHunterAPI(GeneralAPI):
         :param data: Raw data from the API.
         :return: List of parsed and structured Vacancy objects.
         """
+        return list(self.iter_parse(data))
+
+    def iter_parse(self, data: dict) -> Iterator[Vacancy]:
+        """
+        Parses raw job vacancy data from the HeadHunter API one vacancy at a time.
+        Salaries in other currencies and before tax are converted to net roubles.
 
-        vacancies = []
+        :param data: Raw data from the API.
+        :return: Generator of parsed and structured Vacancy objects.
+        """
+        if data is None:
+            return
 
-        for el in data['items']:
-            salary_data = el['salary']
-            salary_from = salary_data.get('from') if salary_data else None
-            salary_to = salary_data.get('to') if salary_data else None
+        items = data['items']
+        salaries = [el['salary'] or {} for el in items]
+        # Salaries of the whole page are converted to net roubles at once
+        salaries_from, salaries_to = self._normalizer.normalize_columns(
+            [salary.get('from') for salary in salaries],
+            [salary.get('to') for salary in salaries],
+            [salary.get('currency') for salary in salaries],
+            [salary.get('gross') for salary in salaries])
 
-            vac = Vacancy(title=el['name'],
-                          vacancy_url=el['alternate_url'],
-                          salary_from=salary_from,
-                          salary_to=salary_to,
-                          employer=el['employer']['name'],
-                          city=el['area']['name'],
-                          requirements=el['snippet']['requirement']
-                          )
+        for el, salary_from, salary_to in zip(items, salaries_from, salaries_to):
+            # The API guarantees the types, so the validation of Vacancy is skipped
+            vac = Vacancy.from_trusted(title=el['name'],
+                                       vacancy_url=el['alternate_url'],
+                                       salary_from=salary_from,
+                                       salary_to=salary_to,
+                                       employer=el['employer']['name'],
+                                       city=el['area']['name'],
+                                       requirements=el['snippet']['requirement'] or ''
+                                       )
 
-            vacancies.append(vac)
-        return vacancies
+            yield vac
 
 
-class SuperJobAPI(GeneralAPI):
+class SuperJobAPI(PlatformAPI):
     """
     Implementation of the General API class for interacting with the SuperJob job vacancies API.
     """
 
-    def __init__(self) -> None:
+    PLATFORM = 'SuperJob'
+    ITEMS_KEY = 'objects'
+    # SuperJob vacancies are refreshed less often than HeadHunter ones
+    CACHE_TTL = 30 * 60
+    # SuperJob allows 120 requests per minute
+    RATE_LIMIT = 2.0
+    RATE_BURST = 5
+    ERROR_MESSAGES = {**PlatformAPI.ERROR_MESSAGES, 403: 'access denied'}
+    # SuperJob returns at most 100 vacancies per page and at most 500 vacancies per search
+    MAX_PER_PAGE = 100
+    MAX_DEPTH = 500
+
+    def __init__(self, **kwargs) -> None:
         """
         Initializes the Super Job API instance.
         Initializes the base URL for the SuperJob API.
+
+        :param kwargs: HTTP layer options of PlatformAPI (session, cache, use_cache, cache_ttl).
         """
-        self._base_url = 'https://api.superjob.ru/2.0/'
+        super().__init__('https://api.superjob.ru/2.0/', **kwargs)
 
-    def get_vacancies(self, name: str, salary: int = None, quantity: int = None) -> dict:
+    def get_vacancies(self, name: str, salary: int = None, quantity: int = None, page: int = None,
+                      date_published_from: int = None, raise_errors: bool = False) -> dict:
         """
         Fetches job vacancies from the SuperJob API.
 
         :param name: Name of the job vacancy.
         :param salary: Desired salary for the vacancy.
         :param quantity: Number of vacancies to retrieve.
-        :return: Dictionary containing job vacancy data.
+        :param page: Number of the results page to retrieve, starting from 0.
+        :param date_published_from: Unix timestamp, only vacancies published after it are returned, newest first.
+        :param raise_errors: Whether a failed request raises APIError instead of printing a message.
+        :return: Dictionary containing job vacancy data, None if the request failed.
         """
 
         url = f'{self._base_url}vacancies'
@@ -111,22 +501,14 @@ class SuperJobAPI(GeneralAPI):
         params = {
             'keyword': name,
             'payment_from': salary,
-            'count': quantity
+            'count': quantity,
+            'page': page,
+            'date_published_from': date_published_from,
+            'order_field': 'date' if date_published_from else None,
         }
 
-        response = requests.get(url, headers=headers, params=params)
-
-        if response.status_code == 200:
-            data = response.json()
-            return data
-        elif response.status_code == 400:
-            print('bad request')
-        elif response.status_code == 403:
-            print('access denied')
-        elif response.status_code == 404:
-            print('not found')
-        else:
-            print('unknown error')
+        status_code, data = self._fetch(url, headers, params)
+        return self._result(status_code, data, raise_errors)
 
     def parse(self, data: dict) -> list[Vacancy]:
         """
@@ -135,18 +517,57 @@ class SuperJobAPI(GeneralAPI):
         :param data: Raw data from the API.
         :return: List of parsed and structured Vacancy objects.
         """
+        return list(self.iter_parse(data))
 
-        vacancies = []
+    def iter_parse(self, data: dict) -> Iterator[Vacancy]:
+        """
+        Parses raw job vacancy data from the SuperJob API one vacancy at a time.
+        Salaries in other currencies are converted to roubles.
 
-        for el in data['objects']:
-            vac = Vacancy(title=el['profession'],
-                          vacancy_url=el['link'],
-                          salary_from=el['payment_from'],
-                          salary_to=el['payment_to'],
-                          employer=el['firm_name'],
-                          city=el['client']['town']['title'],
-                          requirements=el['vacancyRichText']
-                          )
+        :param data: Raw data from the API.
+        :return: Generator of parsed and structured Vacancy objects.
+        """
+        if data is None:
+            return
+
+        items = data['objects']
+        # Salaries of the whole page are converted to net roubles at once
+        salaries_from, salaries_to = self._normalizer.normalize_columns(
+            [el['payment_from'] for el in items],
+            [el['payment_to'] for el in items],
+            [el.get('currency') for el in items])
+
+        for el, salary_from, salary_to in zip(items, salaries_from, salaries_to):
+            # The API guarantees the types, so the validation of Vacancy is skipped
+            vac = Vacancy.from_trusted(title=el['profession'],
+                                       vacancy_url=el['link'],
+                                       salary_from=salary_from,
+                                       salary_to=salary_to,
+                                       employer=el['firm_name'],
+                                       city=el['client']['town']['title'],
+                                       requirements=el['vacancyRichText'] or ''
+                                       )
+
+            yield vac
 
-            vacancies.append(vac)
-        return vacancies
+    def get_vacancies_since(self, name: str, salary: int, quantity: int, since: float, page: int = None) -> dict:
+        """
+        Fetches job vacancies published on SuperJob after the given moment, newest first.
+
+        :param name: Name of the job vacancy.
+        :param salary: Desired salary for the vacancy.
+        :param quantity: Number of vacancies to retrieve.
+        :param since: Unix timestamp of the earliest publication time.
+        :param page: Number of the results page to retrieve, starting from 0.
+        :return: Dictionary containing job vacancy data.
+        """
+        return self.get_vacancies(name, salary, quantity, page=page, date_published_from=int(since))
+
+    def item_timestamp(self, item: dict) -> float:
+        """
+        Returns the publication time of a raw SuperJob vacancy.
+
+        :param item: Raw vacancy data from the API.
+        :return: Unix timestamp of the publication.
+        """
+        return float(item['date_published'])
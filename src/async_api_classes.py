@@ -0,0 +1,118 @@
+import asyncio
+
+import requests
+
+from src.abstract_classes.abstract_async_api import AsyncGeneralAPI
+from src.api_classes import HeadHunterAPI, SuperJobAPI
+from src.models.vacancy import Vacancy
+
+
+class _AsyncPlatformAPI(AsyncGeneralAPI):
+    """
+    Base implementation of the AsyncGeneralAPI class on top of a blocking platform client.
+    Every request runs in a worker thread, so requests to different platforms and for
+    different queries are in flight at the same time while the event loop stays free.
+    """
+
+    def __init__(self, sync_api, max_concurrency: int = 8) -> None:
+        """
+        Initializes the asynchronous API instance.
+
+        :param sync_api: Blocking API client that performs the requests.
+        :param max_concurrency: Maximum number of requests to the platform in flight at once.
+        """
+        self._api = sync_api
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def get_vacancies(self, name: str, salary: int = None, quantity: int = None) -> dict:
+        """
+        Fetches job vacancies from the platform API without blocking the event loop.
+
+        :param name: Name of the job vacancy.
+        :param salary: Desired salary for the vacancy.
+        :param quantity: Number of vacancies to retrieve.
+        :return: Dictionary containing job vacancy data.
+        """
+        async with self._semaphore:
+            return await asyncio.to_thread(self._api.get_vacancies, name, salary, quantity)
+
+    def parse(self, data: dict) -> list[Vacancy]:
+        """
+        Parses raw job vacancy data from the platform API.
+
+        :param data: Raw data from the API.
+        :return: List of parsed and structured Vacancy objects.
+        """
+        if data is None:
+            return []
+        return self._api.parse(data)
+
+    async def search(self, name: str, salary: int = None, quantity: int = None) -> list[Vacancy]:
+        """
+        Fetches job vacancies from the platform API and parses them.
+
+        :param name: Name of the job vacancy.
+        :param salary: Desired salary for the vacancy.
+        :param quantity: Number of vacancies to retrieve.
+        :return: List of parsed and structured Vacancy objects.
+        """
+        data = await self.get_vacancies(name, salary, quantity)
+        return self.parse(data)
+
+    async def search_many(self, names: list[str], salary: int = None, quantity: int = None) -> list[list[Vacancy]]:
+        """
+        Searches job vacancies for several job titles at once.
+
+        :param names: Names of the job vacancies.
+        :param salary: Desired salary for the vacancies.
+        :param quantity: Number of vacancies to retrieve per job title.
+        :return: Lists of parsed Vacancy objects in the order of the job titles.
+        """
+        return list(await asyncio.gather(*(self.search(name, salary, quantity) for name in names)))
+
+
+class AsyncHeadHunterAPI(_AsyncPlatformAPI):
+    """
+    Implementation of the AsyncGeneralAPI class for interacting with the HeadHunter job vacancies API.
+    """
+
+    def __init__(self, max_concurrency: int = 8, session: requests.Session = None) -> None:
+        """
+        Initializes the asynchronous HeadHunter API instance.
+
+        :param max_concurrency: Maximum number of requests to HeadHunter in flight at once.
+        :param session: HTTP session used for requests, the shared pooled session by default.
+        """
+        super().__init__(HeadHunterAPI(session=session), max_concurrency)
+
+
+class AsyncSuperJobAPI(_AsyncPlatformAPI):
+    """
+    Implementation of the AsyncGeneralAPI class for interacting with the SuperJob job vacancies API.
+    """
+
+    def __init__(self, max_concurrency: int = 8, session: requests.Session = None) -> None:
+        """
+        Initializes the asynchronous SuperJob API instance.
+
+        :param max_concurrency: Maximum number of requests to SuperJob in flight at once.
+        :param session: HTTP session used for requests, the shared pooled session by default.
+        """
+        super().__init__(SuperJobAPI(session=session), max_concurrency)
+
+
+async def search_platforms(platforms: list[AsyncGeneralAPI], names: list[str],
+                           salary: int = None, quantity: int = None) -> list[Vacancy]:
+    """
+    Searches job vacancies for all job titles on all platforms concurrently,
+    so the total time is close to the time of the slowest request rather than the sum of all.
+
+    :param platforms: Asynchronous API clients of the platforms to search.
+    :param names: Names of the job vacancies.
+    :param salary: Desired salary for the vacancies.
+    :param quantity: Number of vacancies to retrieve per job title and platform.
+    :return: List of parsed Vacancy objects grouped by platform, then by job title.
+    """
+    results = await asyncio.gather(*(platform.search(name, salary, quantity)
+                                     for platform in platforms for name in names))
+    return [vacancy for vacancies in results for vacancy in vacancies]
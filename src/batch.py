@@ -0,0 +1,325 @@
+"""Non-interactive batch mode: runs the searches of a job file and saves the found vacancies"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import requests
+
+from src import instrumentation
+from src.api_classes import APIError, HeadHunterAPI, SuperJobAPI
+from src.dedup import Deduplicator
+from src.file_saver import add_new_vacancies
+from src.models.vacancy import Vacancy
+from src.utils.utils import storages
+
+# Platform clients by the names accepted in job files
+PLATFORMS = {
+    'headhunter': HeadHunterAPI,
+    'hh': HeadHunterAPI,
+    'superjob': SuperJobAPI,
+    'sj': SuperJobAPI,
+}
+
+# Storage formats by the names accepted on the command line
+STORAGES = {name.lower().replace(' ', ''): (name, storage_class, file_path)
+            for name, storage_class, file_path in storages}
+
+
+class SearchSpec:
+    """
+    A search of a job file.
+
+    Attributes:
+        platform (str): Name of the platform: HeadHunter (hh) or SuperJob (sj).
+        title (str): The job title to search for.
+        salary (int, None): The minimum desired salary.
+        quantity (int, None): The number of vacancies to fetch, all available if None.
+    """
+
+    def __init__(self, platform: str, title: str, salary: int = None, quantity: int = None) -> None:
+        """
+        Initializes a SearchSpec instance.
+
+        Args:
+            platform: Name of the platform: HeadHunter (hh) or SuperJob (sj).
+            title: The job title to search for.
+            salary: The minimum desired salary.
+            quantity: The number of vacancies to fetch, all available if None.
+        """
+        self.platform = platform
+        self.title = title
+        self.salary = salary
+        self.quantity = quantity
+
+
+class SearchResult:
+    """
+    The outcome of a search of a job file.
+
+    Attributes:
+        spec (SearchSpec): The search.
+        vacancies (list[Vacancy]): The found vacancies.
+        seconds (float): The time the search took.
+        error (str, None): The error message if the search failed.
+    """
+
+    def __init__(self, spec: SearchSpec, vacancies: list[Vacancy] = None, seconds: float = 0.0,
+                 error: str = None) -> None:
+        """
+        Initializes a SearchResult instance.
+
+        Args:
+            spec: The search.
+            vacancies: The found vacancies, none if the search failed.
+            seconds: The time the search took.
+            error: The error message if the search failed.
+        """
+        self.spec = spec
+        self.vacancies = vacancies or []
+        self.seconds = seconds
+        self.error = error
+
+
+def _optional_int(value):
+    """Converts an optional number from a job file to int, None if it is empty"""
+    if value is None or str(value).strip() == '':
+        return None
+    return int(value)
+
+
+def read_records(file_path: str) -> list[dict]:
+    """
+    Reads the records of a job file: the rows of a CSV file with a header or the objects of a JSON list.
+
+    Args:
+        file_path: Path to the job file.
+    Returns:
+        list[dict]: The records in the order of the file.
+    """
+    with open(file_path, 'r', newline='', encoding='utf-8') as file:
+        if file_path.endswith('.json'):
+            return json.load(file)
+        return list(csv.DictReader(file))
+
+
+def parse_record(number: int, record: dict) -> SearchSpec:
+    """
+    Converts a record of a job file to a search.
+
+    Args:
+        number: Number of the record in the file, starting from 1, for error messages.
+        record: The record with the keys platform, title, salary and quantity.
+    Returns:
+        SearchSpec: The search.
+    Raises:
+        ValueError: If the record names an unknown platform or has no title.
+    """
+    platform = (record.get('platform') or '').strip()
+    title = (record.get('title') or '').strip()
+    if platform.lower() not in PLATFORMS:
+        raise ValueError(f"Search {number}: unknown platform '{platform}'")
+    if not title:
+        raise ValueError(f"Search {number}: the job title is empty")
+    return SearchSpec(platform, title, _optional_int(record.get('salary')), _optional_int(record.get('quantity')))
+
+
+def read_job_file(file_path: str) -> list[SearchSpec]:
+    """
+    Reads the searches from a job file.
+    A CSV file has the header platform,title,salary,quantity, a JSON file holds a list of objects
+    with the same keys. Salary and quantity may be left empty.
+
+    Args:
+        file_path: Path to the job file.
+    Returns:
+        list[SearchSpec]: The searches in the order of the file.
+    Raises:
+        ValueError: If a search names an unknown platform or has no title.
+    """
+    return [parse_record(number, record) for number, record in enumerate(read_records(file_path), 1)]
+
+
+def _clients(specs: list[SearchSpec]) -> dict:
+    """Creates one API client per platform of the searches"""
+    clients = {}
+    for spec in specs:
+        api_class = PLATFORMS[spec.platform.lower()]
+        if api_class not in clients:
+            clients[api_class] = api_class()
+    return clients
+
+
+def run_search(api, spec: SearchSpec) -> SearchResult:
+    """
+    Runs a search, fetching as many pages as its quantity needs.
+    The pages of a HeadHunter search are fetched concurrently.
+
+    Args:
+        api: API client of the platform of the search.
+        spec: The search.
+    Returns:
+        SearchResult: The result, with the error message if a request of the search failed.
+    """
+    started = time.perf_counter()
+    try:
+        if hasattr(api, 'get_vacancies_paginated'):
+            vacancies = api.parse(api.get_vacancies_paginated(spec.title, spec.salary, spec.quantity))
+        else:
+            vacancies = list(api.iter_vacancies(spec.title, spec.salary, spec.quantity, spec.quantity))
+    except (APIError, requests.RequestException) as error:
+        return SearchResult(spec, seconds=time.perf_counter() - started, error=str(error))
+    return SearchResult(spec, vacancies, time.perf_counter() - started)
+
+
+async def run_searches(specs: list[SearchSpec], concurrency: int = 4) -> list[SearchResult]:
+    """
+    Runs the searches concurrently, at most `concurrency` searches per platform at a time.
+    A failed search does not stop the others, its error is kept in the result.
+
+    Args:
+        specs: The searches.
+        concurrency: Maximum number of searches in flight per platform.
+    Returns:
+        list[SearchResult]: The results in the order of the searches.
+    """
+    clients = _clients(specs)
+    semaphores = {api_class: asyncio.Semaphore(concurrency) for api_class in clients}
+
+    async def run(spec: SearchSpec) -> SearchResult:
+        api_class = PLATFORMS[spec.platform.lower()]
+        async with semaphores[api_class]:
+            return await asyncio.to_thread(run_search, clients[api_class], spec)
+
+    return list(await asyncio.gather(*(run(spec) for spec in specs)))
+
+
+def run_searches_sequentially(specs: list[SearchSpec]) -> list[SearchResult]:
+    """
+    Runs the searches one by one in the calling thread, so that a profiler sees all of the work.
+
+    Args:
+        specs: The searches.
+    Returns:
+        list[SearchResult]: The results in the order of the searches.
+    """
+    clients = _clients(specs)
+    return [run_search(clients[PLATFORMS[spec.platform.lower()]], spec) for spec in specs]
+
+
+def print_summary(results: list[SearchResult], seconds: float, unique: int, saved: int) -> None:
+    """
+    Prints the time and the number of vacancies of every search and the totals.
+
+    Args:
+        results: The results of the searches.
+        seconds: The total time of the run.
+        unique: The number of vacancies left after removing duplicates.
+        saved: The number of vacancies written to the storage.
+    """
+    print(f"{'#':>3}  {'platform':<10}  {'title':<30}  {'salary':>8}  {'found':>6}  {'time, s':>8}  status")
+    for number, result in enumerate(results, 1):
+        spec = result.spec
+        status = f'error: {result.error}' if result.error else 'ok'
+        print(f"{number:>3}  {spec.platform:<10}  {spec.title[:30]:<30}  {spec.salary or '-':>8}  "
+              f"{len(result.vacancies):>6}  {result.seconds:>8.2f}  {status}")
+
+    found = sum(len(result.vacancies) for result in results)
+    failed = sum(result.error is not None for result in results)
+    print(f'Searches: {len(results)}, failed: {failed}, vacancies found: {found}, unique: {unique}, '
+          f'saved: {saved}, total time: {seconds:.2f} s, {len(results) / seconds if seconds else 0:.1f} searches/s')
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    Runs the batch mode.
+
+    Args:
+        argv: Command line arguments, sys.argv by default.
+    Returns:
+        int: Exit code, 1 if any search failed.
+    """
+    parser = argparse.ArgumentParser(prog='python -m src.batch',
+                                     description='Runs the searches of a job file and saves the found vacancies.')
+    parser.add_argument('job_file', help='CSV file with the header platform,title,salary,quantity '
+                                         'or JSON file with a list of such objects')
+    parser.add_argument('--storage', choices=sorted(STORAGES), default='json',
+                        help='storage format of the results (default: json)')
+    parser.add_argument('--output', help='path to the file with the results, the path of the menu by default')
+    parser.add_argument('--mode', choices=('merge', 'save'), default='merge',
+                        help='merge: add new vacancies to the file, save: overwrite the file (default: merge)')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='maximum number of searches in flight per platform (default: 4)')
+    parser.add_argument('--metrics', help='file to write the timings, counts and cache hit rate to as JSON')
+    parser.add_argument('--metrics-port', type=int,
+                        help='serve the metrics in the Prometheus format at http://127.0.0.1:PORT/metrics '
+                             'while the run lasts')
+    parser.add_argument('--profile', nargs='?', const='', metavar='FILE',
+                        help='run the searches one by one under cProfile, print the hottest functions '
+                             'and save the profile to FILE if given')
+    args = parser.parse_args(argv)
+
+    if args.metrics or args.metrics_port is not None:
+        instrumentation.enable()
+    metrics_server = None
+    if args.metrics_port is not None:
+        metrics_server = instrumentation.metrics.serve(args.metrics_port)
+    try:
+        if args.profile is None:
+            return _run(args)
+        with instrumentation.profiling(args.profile or None):
+            return _run(args)
+    finally:
+        if args.metrics:
+            instrumentation.metrics.write(args.metrics)
+            print(f'Metrics saved to {args.metrics}')
+        if metrics_server is not None:
+            metrics_server.shutdown()
+
+
+def _run(args: argparse.Namespace) -> int:
+    """Runs the searches of the job file and saves the found vacancies"""
+    specs = read_job_file(args.job_file)
+    storage_name, storage_class, file_path = STORAGES[args.storage]
+
+    started = time.perf_counter()
+    if args.profile is not None:
+        # The profiler sees only the calling thread
+        results = run_searches_sequentially(specs)
+    else:
+        results = asyncio.run(run_searches(specs, args.concurrency))
+
+    output = args.output or file_path
+    try:
+        vacancies, saved = _save(results, storage_class, output, args.mode)
+    except (OSError, sqlite3.Error) as error:
+        print(f'Could not save the vacancies to {output}: {error}')
+        return 1
+
+    print_summary(results, time.perf_counter() - started, len(vacancies), saved)
+    print(f'{storage_name} file: {output}')
+    return 1 if any(result.error for result in results) else 0
+
+
+def _save(results: list[SearchResult], storage_class, output: str, mode: str) -> tuple[list[Vacancy], int]:
+    """Saves the vacancies of the searches without duplicates, returns them and the number of saved ones"""
+    deduplicator = Deduplicator()
+    if mode == 'merge' and os.path.isfile(output):
+        # Vacancies saved by previous runs are not added again
+        for vacancy in storage_class([], output).load_from_file():
+            deduplicator.add(vacancy)
+    vacancies = deduplicator.filter(vacancy for result in results for vacancy in result.vacancies)
+    storage = storage_class(vacancies, output)
+    if mode == 'merge':
+        # The deduplicator holds the vacancies of the file, so the rest can be appended without reading it again
+        return vacancies, add_new_vacancies(storage)
+    storage.save_to_file()
+    return vacancies, len(vacancies)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Synthetic HeadHunter and SuperJob API responses for the benchmarks"""
+import random
+
+CITIES = ['Москва', 'Санкт-Петербург', 'Новосибирск', 'Екатеринбург', 'Казань', 'Нижний Новгород',
+          'Челябинск', 'Самара', 'Омск', 'Ростов-на-Дону', 'Уфа', 'Красноярск', 'Пермь', 'Воронеж']
+TITLES = ['Python developer', 'Backend-разработчик', 'Data Scientist', 'Аналитик данных', 'DevOps-инженер',
+          'Frontend-разработчик', 'QA-инженер', 'Тестировщик', 'Системный администратор', 'Team Lead']
+LEVELS = ['Junior', 'Middle', 'Senior', 'Lead', '']
+SKILLS = ['Python', 'Django', 'FastAPI', 'PostgreSQL', 'Redis', 'Docker', 'Kubernetes', 'Git', 'Linux',
+          'SQL', 'REST API', 'asyncio', 'Celery', 'RabbitMQ', 'Kafka', 'pandas', 'NumPy', 'CI/CD']
+PHRASES = ['Опыт коммерческой разработки от {years} лет', 'Уверенное знание {skill}',
+           'Опыт работы с {skill} и {skill2}', 'Понимание принципов ООП', 'Умение писать тесты',
+           'Знание <highlighttext>{skill}</highlighttext>', 'Английский язык на уровне чтения документации']
+
+
+def _requirements(generator: random.Random) -> str:
+    """Builds the requirements of a vacancy from random phrases"""
+    phrases = generator.sample(PHRASES, generator.randint(2, 4))
+    return '. '.join(phrase.format(years=generator.randint(1, 5), skill=generator.choice(SKILLS),
+                                   skill2=generator.choice(SKILLS)) for phrase in phrases) + '.'
+
+
+def _salary(generator: random.Random):
+    """Returns random salary bounds, either of them may be missing like in real vacancies"""
+    low = generator.randrange(30_000, 300_000, 5_000)
+    high = low + generator.randrange(0, 150_000, 5_000)
+    kind = generator.random()
+    if kind < 0.2:
+        return None, None
+    if kind < 0.45:
+        return low, None
+    if kind < 0.6:
+        return None, high
+    return low, high
+
+
+def make_hh_items(count: int, seed: int = 0) -> list[dict]:
+    """
+    Creates vacancies shaped like the items of the HeadHunter /vacancies response.
+
+    :param count: Number of vacancies.
+    :param seed: Seed of the random generator, the same seed gives the same vacancies.
+    :return: List of raw vacancies.
+    """
+    generator = random.Random(seed)
+    items = []
+    for number in range(count):
+        low, high = _salary(generator)
+        city = generator.choice(CITIES)
+        employer_id = generator.randrange(count // 10 + 1)
+        items.append({
+            'id': str(10_000_000 + number),
+            'name': f'{generator.choice(LEVELS)} {generator.choice(TITLES)}'.strip(),
+            'alternate_url': f'https://hh.ru/vacancy/{10_000_000 + number}',
+            'salary': None if low is None and high is None else {
+                'from': low, 'to': high, 'currency': 'RUR', 'gross': generator.random() < 0.5},
+            'employer': {'id': str(employer_id), 'name': f'Компания {employer_id}'},
+            'area': {'id': str(CITIES.index(city) + 1), 'name': city},
+            'snippet': {'requirement': _requirements(generator) if generator.random() < 0.95 else None,
+                        'responsibility': 'Разработка и поддержка сервисов.'},
+            'published_at': f'2024-{generator.randint(1, 12):02d}-{generator.randint(1, 28):02d}T'
+                            f'{generator.randint(0, 23):02d}:00:00+0300',
+        })
+    return items
+
+
+def make_sj_items(count: int, seed: int = 0) -> list[dict]:
+    """
+    Creates vacancies shaped like the objects of the SuperJob /vacancies response.
+    A missing salary is 0, as SuperJob returns it.
+
+    :param count: Number of vacancies.
+    :param seed: Seed of the random generator, the same seed gives the same vacancies.
+    :return: List of raw vacancies.
+    """
+    generator = random.Random(seed)
+    items = []
+    for number in range(count):
+        low, high = _salary(generator)
+        city = generator.choice(CITIES)
+        items.append({
+            'id': 40_000_000 + number,
+            'profession': f'{generator.choice(LEVELS)} {generator.choice(TITLES)}'.strip(),
+            'link': f'https://www.superjob.ru/vakansii/vacancy-{40_000_000 + number}.html',
+            'payment_from': low or 0,
+            'payment_to': high or 0,
+            'currency': 'rub',
+            'firm_name': f'Компания {generator.randrange(count // 10 + 1)}',
+            'client': {'town': {'id': CITIES.index(city) + 1, 'title': city}},
+            'vacancyRichText': _requirements(generator) if generator.random() < 0.95 else None,
+            'date_published': 1_700_000_000 + generator.randrange(30_000_000),
+        })
+    return items
+
+
+def hh_page(items: list[dict], page: int, per_page: int) -> dict:
+    """
+    Builds a page of the HeadHunter /vacancies response.
+
+    :param items: All vacancies of the search.
+    :param page: Number of the page, starting from 0.
+    :param per_page: Number of vacancies per page.
+    :return: The response.
+    """
+    start = page * per_page
+    return {'items': items[start:start + per_page], 'found': len(items), 'page': page,
+            'pages': (len(items) + per_page - 1) // per_page, 'per_page': per_page}
+
+
+def sj_page(items: list[dict], page: int, per_page: int) -> dict:
+    """
+    Builds a page of the SuperJob /vacancies response.
+
+    :param items: All vacancies of the search.
+    :param page: Number of the page, starting from 0.
+    :param per_page: Number of vacancies per page.
+    :return: The response.
+    """
+    start = page * per_page
+    return {'objects': items[start:start + per_page], 'total': len(items),
+            'more': start + per_page < len(items)}
@@ -0,0 +1,99 @@
+"""Local HTTP server imitating the HeadHunter and SuperJob APIs for the benchmarks"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from src.benchmarks.payloads import hh_page, sj_page
+
+# Paths of the imitated APIs, the base URLs of the clients point to them
+HH_PATH = '/hh/'
+SJ_PATH = '/sj/'
+
+
+class StubAPIServer:
+    """
+    Serves /hh/vacancies and /sj/vacancies pages built from the given synthetic vacancies.
+    Encoded pages are cached, so the server measures the clients rather than itself.
+
+    Used as a context manager: the server runs in a background thread while the block runs.
+    """
+
+    def __init__(self, hh_items: list[dict], sj_items: list[dict]) -> None:
+        """
+        Initializes the server on a free local port.
+
+        :param hh_items: Vacancies of the HeadHunter API.
+        :param sj_items: Vacancies of the SuperJob API.
+        """
+        self.hh_items = hh_items
+        self.sj_items = sj_items
+        self.requests = 0
+        self._pages = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Returns the root URL of the server"""
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _page(self, path: str, query: dict) -> bytes:
+        """Returns the encoded page for the path and the query string, None for an unknown path"""
+        page = int(query.get('page', ['0'])[0])
+        if path == f'{HH_PATH}vacancies':
+            key = ('hh', page, int(query.get('per_page', ['20'])[0]))
+        elif path == f'{SJ_PATH}vacancies':
+            key = ('sj', page, int(query.get('count', ['20'])[0]))
+        else:
+            return None
+
+        with self._lock:
+            self.requests += 1
+            body = self._pages.get(key)
+        if body is None:
+            platform, page, per_page = key
+            data = hh_page(self.hh_items, page, per_page) if platform == 'hh' else sj_page(self.sj_items, page, per_page)
+            body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+            with self._lock:
+                self._pages[key] = body
+        return body
+
+    def _handler_class(self):
+        """Creates the request handler bound to this server"""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                body = stub._page(parts.path, parse_qs(parts.query))
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self) -> 'StubAPIServer':
+        """Starts the server"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Stops the server"""
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
@@ -0,0 +1,244 @@
+"""
+Benchmark suite of the hot paths: fetching through a local stub API, parsing, Vacancy construction,
+saving, loading and querying JSON, CSV (read whole or streamed) and Parquet files.
+Results are written as JSON to compare runs.
+Run from the project root: python -m src.benchmarks.suite --sizes 1000 10000 100000 --output results.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from src.api_classes import HeadHunterAPI, SuperJobAPI
+from src.benchmarks.payloads import hh_page, make_hh_items, make_sj_items, sj_page
+from src.benchmarks.stub_server import HH_PATH, SJ_PATH, StubAPIServer
+from src.file_saver import CSVSaver, JsonSaver, ParquetSaver, StreamingCSVSaver
+from src.models.vacancy import Vacancy
+from src.rate_limiter import TokenBucket
+from src.salary_index import get_salary_index
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+PER_PAGE = 100
+# Benchmarks faster than this are too noisy to be compared with the baseline
+MIN_COMPARED_SECONDS = 0.001
+
+
+def measure(function, repeat: int = 3) -> dict:
+    """
+    Runs the function several times.
+
+    :param function: Function without arguments returning the number of processed items.
+    :param repeat: Number of runs.
+    :return: Time of the first run, the best time and the number of items.
+    """
+    times = []
+    items = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        items = function()
+        times.append(time.perf_counter() - started)
+    return {'first_seconds': times[0], 'seconds': min(times), 'items': items}
+
+
+def _stub_clients(server: StubAPIServer) -> tuple[HeadHunterAPI, SuperJobAPI]:
+    """Creates API clients pointed at the stub server, without the cache and the rate limit"""
+    unlimited = dict(use_cache=False, rate_limiter=TokenBucket(1e9, 10 ** 9))
+    hh_api, sj_api = HeadHunterAPI(**unlimited), SuperJobAPI(**unlimited)
+    hh_api._base_url = f'{server.url}{HH_PATH}'
+    sj_api._base_url = f'{server.url}{SJ_PATH}'
+    return hh_api, sj_api
+
+
+def bench_fetch(hh_items: list[dict], sj_items: list[dict], repeat: int) -> dict:
+    """Times fetching of the deepest searches the platforms allow from the stub server"""
+    results = {}
+    with StubAPIServer(hh_items, sj_items) as server:
+        hh_api, sj_api = _stub_clients(server)
+        results['fetch.hh.iter_vacancies'] = measure(
+            lambda: sum(1 for _ in hh_api.iter_vacancies('python', quantity=hh_api.MAX_DEPTH)), repeat)
+        results['fetch.hh.paginated'] = measure(
+            lambda: len(hh_api.get_vacancies_paginated('python', quantity=hh_api.MAX_DEPTH)['items']), repeat)
+        results['fetch.sj.iter_vacancies'] = measure(
+            lambda: sum(1 for _ in sj_api.iter_vacancies('python', quantity=sj_api.MAX_DEPTH)), repeat)
+    return results
+
+
+def bench_parse(hh_items: list[dict], sj_items: list[dict], repeat: int) -> dict:
+    """Times parsing of the raw pages"""
+    hh_api, sj_api = HeadHunterAPI(use_cache=False), SuperJobAPI(use_cache=False)
+    hh_pages = [hh_page(hh_items, page, PER_PAGE) for page in range((len(hh_items) + PER_PAGE - 1) // PER_PAGE)]
+    sj_pages = [sj_page(sj_items, page, PER_PAGE) for page in range((len(sj_items) + PER_PAGE - 1) // PER_PAGE)]
+    return {
+        'parse.hh': measure(lambda: sum(len(hh_api.parse(page)) for page in hh_pages), repeat),
+        'parse.sj': measure(lambda: sum(len(sj_api.parse(page)) for page in sj_pages), repeat),
+    }
+
+
+def bench_vacancy(rows: list[tuple], repeat: int) -> dict:
+    """Times the construction of vacancies with and without validation"""
+    def construct(constructor):
+        for row in rows:
+            constructor(*row)
+        return len(rows)
+
+    return {
+        'vacancy.init': measure(lambda: construct(Vacancy), repeat),
+        'vacancy.from_trusted': measure(lambda: construct(Vacancy.from_trusted), repeat),
+    }
+
+
+def bench_storage(name: str, storage, repeat: int) -> dict:
+    """Times saving, loading and the queries of a storage, deletion goes last as it changes the file"""
+    path = getattr(storage, 'path', None) or storage.filename
+
+    def save():
+        storage.save_to_file()
+        return len(storage.parse_data)
+
+    def load_cold():
+        # The loaded data and the salary index are cached by the savers between calls
+        JsonSaver._loaded_files.clear()
+        return len(storage.load_from_file())
+
+    def scanning(query):
+        # A query processes the whole file, so its rate is counted in saved vacancies per second
+        def run():
+            query()
+            return len(storage.parse_data)
+        return run
+
+    results = {
+        f'{name}.save': measure(save, repeat),
+        f'{name}.load': measure(load_cold, repeat),
+        f'{name}.load_cached': measure(lambda: len(storage.load_from_file()), repeat),
+        f'{name}.salary_index_build': measure(lambda: _build_salary_index(path, storage), 1),
+        f'{name}.get_vacancies_by_salary': measure(scanning(lambda: storage.get_vacancies_by_salary(150_000)), repeat),
+        f'{name}.get_vacancies_by_salary_range': measure(
+            scanning(lambda: storage.get_vacancies_by_salary_range(100_000, 200_000, 'average')), repeat),
+        f'{name}.get_vacancies_by_city': measure(scanning(lambda: storage.get_vacancies_by_city('Казань')), repeat),
+        f'{name}.top_vacancies': measure(scanning(lambda: storage.top_vacancies(10)), repeat),
+    }
+    if hasattr(storage, 'search_vacancies'):
+        results[f'{name}.search_vacancies'] = measure(
+            scanning(lambda: storage.search_vacancies('python django')), repeat)
+    results[f'{name}.delete_vacancy'] = measure(scanning(lambda: storage.delete_vacancy('Senior Python developer')), 1)
+    return results
+
+
+def _build_salary_index(path: str, storage) -> int:
+    """Builds the salary index of a file from scratch, reading of the file included"""
+    if os.path.isfile(f'{path}.salidx'):
+        os.remove(f'{path}.salidx')
+    os.utime(path)
+    get_salary_index(path, storage.load_from_file)
+    return len(storage.load_from_file())
+
+
+def run_size(size: int, workdir: str, repeat: int, fetch: bool) -> list[dict]:
+    """
+    Runs the benchmarks for one number of vacancies.
+
+    :param size: Number of vacancies.
+    :param workdir: Directory for the files of the savers.
+    :param repeat: Number of runs of every benchmark.
+    :param fetch: Whether to time fetching from the stub server.
+    :return: Results of the benchmarks.
+    """
+    hh_items, sj_items = make_hh_items(size), make_sj_items(size, seed=1)
+    results = {}
+    if fetch:
+        results.update(bench_fetch(hh_items, sj_items, repeat))
+    results.update(bench_parse(hh_items, sj_items, repeat))
+
+    vacancies = HeadHunterAPI(use_cache=False).parse({'items': hh_items})
+    results.update(bench_vacancy([vacancy.to_tuple() for vacancy in vacancies], repeat))
+    results.update(bench_storage('json', JsonSaver(vacancies, os.path.join(workdir, f'{size}.json')), repeat))
+    results.update(bench_storage('csv', CSVSaver(vacancies, os.path.join(workdir, f'{size}.csv')), repeat))
+    results.update(bench_storage('csv_streaming',
+                                 StreamingCSVSaver(vacancies, os.path.join(workdir, f'{size}.stream.csv')), repeat))
+    if ParquetSaver.available():
+        results.update(bench_storage('parquet', ParquetSaver(vacancies, os.path.join(workdir, f'{size}.parquet')), repeat))
+
+    return [dict(name=name, size=size, **result,
+                 items_per_second=result['items'] / result['seconds'] if result['items'] and result['seconds'] else None)
+            for name, result in results.items()]
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """
+    Finds the benchmarks that became slower than in the baseline run.
+
+    :param results: Results of this run.
+    :param baseline: Results of the baseline run.
+    :param tolerance: Allowed slowdown, 0.2 for 20%.
+    :return: Descriptions of the regressions.
+    """
+    previous = {(result['name'], result['size']): result['seconds'] for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result['name'], result['size']))
+        if before and before >= MIN_COMPARED_SECONDS and result['seconds'] > before * (1 + tolerance):
+            regressions.append(f"{result['name']} [{result['size']}]: {before:.4f} s -> {result['seconds']:.4f} s "
+                               f"({result['seconds'] / before - 1:+.0%})")
+    return regressions
+
+
+def print_result(result: dict) -> None:
+    """Prints the result of a benchmark as a line of the summary"""
+    rate = '' if result['items_per_second'] is None else f"{result['items_per_second']:>14,.0f} items/s"
+    print(f"{result['size']:>9}  {result['name']:<45} {result['seconds']:>10.4f} s  {rate}")
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    Runs the suite, prints a summary and writes the results as JSON.
+
+    :param argv: Command line arguments, sys.argv by default.
+    :return: Exit code, 1 if a benchmark regressed against the baseline.
+    """
+    parser = argparse.ArgumentParser(prog='python -m src.benchmarks.suite', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='numbers of vacancies, up to 1000000 (default: 1000 10000 100000)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs of every benchmark, the best is kept')
+    parser.add_argument('--output', default='benchmark_results.json', help='file for the JSON results')
+    parser.add_argument('--no-fetch', action='store_true', help='skip the benchmarks of the stub HTTP server')
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown against the baseline')
+    args = parser.parse_args(argv)
+
+    started_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for number, size in enumerate(args.sizes):
+            # Fetching is capped by the search depth of the platforms, so it is timed once
+            size_results = run_size(size, workdir, args.repeat, fetch=number == 0 and not args.no_fetch)
+            for result in size_results:
+                print_result(result)
+            results += size_results
+
+    report = {
+        'started_at': started_at,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    print(f'Results saved to {args.output}')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            regressions = compare(results, json.load(file)['results'], args.tolerance)
+        for regression in regressions:
+            print(f'Regression: {regression}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
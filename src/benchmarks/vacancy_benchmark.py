@@ -0,0 +1,47 @@
+"""
+Benchmark of the Vacancy model: memory per vacancy and constructions per second.
+Run from the project root: python -m src.benchmarks.vacancy_benchmark
+"""
+import time
+import tracemalloc
+
+from src.models.vacancy import Vacancy
+
+
+def make_fields(count: int) -> list[tuple]:
+    """Creates the attributes of `count` vacancies, strings are shared like in parsed API responses"""
+    return [(f'Python developer {i}', f'https://hh.ru/vacancy/{i}', 1000 * (i % 300) or None, 2000 * (i % 200) or None,
+             'Employer', 'Москва', 'Python, SQL, Git') for i in range(count)]
+
+
+def measure_memory(fields: list[tuple]) -> float:
+    """Returns the number of bytes allocated per vacancy, shared strings excluded"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    vacancies = [Vacancy.from_trusted(*item) for item in fields]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # The list holding the vacancies is not a part of a vacancy
+    return (after - before) / len(vacancies) - 8
+
+
+def measure_rate(constructor, fields: list[tuple]) -> float:
+    """Returns the number of vacancies created per second by the constructor"""
+    start = time.perf_counter()
+    for item in fields:
+        constructor(*item)
+    return len(fields) / (time.perf_counter() - start)
+
+
+def main(count: int = 1_000_000) -> None:
+    """Prints the results of the benchmark for `count` vacancies"""
+    fields = make_fields(count)
+
+    print(f'Vacancies: {count}')
+    print(f'Bytes per vacancy: {measure_memory(fields):.0f}')
+    print(f'Vacancy(): {measure_rate(Vacancy, fields):,.0f} constructions/s')
+    print(f'Vacancy.from_trusted(): {measure_rate(Vacancy.from_trusted, fields):,.0f} constructions/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,410 @@
+"""
+Crawl scheduler: keeps a set of searches fresh by running each of them again after its refresh interval.
+Run from the project root: python -m src.crawl_scheduler tasks.csv --storage jsonlines
+"""
+import argparse
+import heapq
+import itertools
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.batch import PLATFORMS, STORAGES, SearchSpec, parse_record, read_records
+from src.crawl_state import CrawlState
+from src.dedup import Deduplicator
+from src.file_saver import add_new_vacancies
+
+# The path to save the progress of the crawl
+CHECKPOINT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               'saved_vacancies', 'crawl_checkpoint.json')
+DEFAULT_REFRESH = 6 * 60 * 60
+# A failed search is retried after this delay or after its refresh interval if that is shorter
+RETRY_DELAY = 15 * 60
+DEFAULT_WORKERS = 2
+
+
+class CrawlTask:
+    """
+    A search run again and again by the crawl scheduler.
+
+    Attributes:
+        spec (SearchSpec): The search.
+        refresh (float): Seconds between two runs of the search.
+        key (str): Key identifying the search in the checkpoint.
+        next_run (float): Unix time when the search is due.
+    """
+
+    def __init__(self, spec: SearchSpec, refresh: float = DEFAULT_REFRESH) -> None:
+        self.spec = spec
+        self.refresh = refresh
+        self.api_class = PLATFORMS[spec.platform.lower()]
+        self.key = CrawlState.make_key(self.api_class.PLATFORM, spec.title, spec.salary)
+        self.next_run = 0.0
+
+
+def read_task_file(file_path: str, refresh: float = DEFAULT_REFRESH) -> list[CrawlTask]:
+    """
+    Reads the tasks of a crawl from a job file.
+    The file has the columns of a batch job file (platform, title, salary, quantity)
+    and an optional column refresh with the interval between runs in seconds.
+
+    Args:
+        file_path: Path to the job file.
+        refresh: Refresh interval of the tasks without their own.
+    Returns:
+        list[CrawlTask]: The tasks in the order of the file.
+    Raises:
+        ValueError: If a search names an unknown platform, has no title or repeats another search.
+    """
+    tasks = []
+    keys = set()
+    for number, record in enumerate(read_records(file_path), 1):
+        task_refresh = str(record.get('refresh') or '').strip()
+        task = CrawlTask(parse_record(number, record), float(task_refresh) if task_refresh else refresh)
+        if task.key in keys:
+            raise ValueError(f"Search {number}: '{task.spec.title}' is already in the file")
+        keys.add(task.key)
+        tasks.append(task)
+    return tasks
+
+
+class Checkpoint:
+    """
+    Stores, for every task of a crawl, when it was last completed and when it is due again,
+    so that an interrupted crawl resumes without fetching the completed tasks again.
+    """
+
+    def __init__(self, file_path: str = CHECKPOINT_PATH) -> None:
+        """
+        Initializes a Checkpoint instance and loads the saved progress.
+
+        Args:
+            file_path: Path to the JSON file with the progress.
+        """
+        self.path = file_path
+        self._lock = threading.Lock()
+        self._tasks = {}
+        if os.path.isfile(file_path):
+            with open(file_path, 'r', encoding='utf-8') as file:
+                self._tasks = json.load(file)
+
+    def next_run(self, key: str) -> float:
+        """
+        Returns when a task is due.
+
+        Args:
+            key: Key of the task.
+        Returns:
+            Unix time of the next run, 0 if the task has never been run.
+        """
+        with self._lock:
+            return self._tasks.get(key, {}).get('next_run', 0.0)
+
+    def complete(self, key: str, next_run: float, found: int, saved: int, error: str = None) -> None:
+        """
+        Records a run of a task and saves the progress.
+
+        Args:
+            key: Key of the task.
+            next_run: Unix time when the task is due again.
+            found: Number of vacancies found by the run.
+            saved: Number of new vacancies written to the storage.
+            error: The error message if the run failed.
+        """
+        with self._lock:
+            self._tasks[key] = {'last_run': time.time(), 'next_run': next_run, 'found': found, 'saved': saved,
+                                'error': error}
+            self.save()
+
+    def save(self) -> None:
+        """
+        Saves the progress to the JSON file.
+        """
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self._tasks, file, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+class CrawlScheduler:
+    """
+    Runs crawl tasks in the order in which they become due.
+
+    Every platform has its own bounded pool of workers, so a slow or throttled platform does not hold up
+    the other one, and a task is taken from the priority queue only when a worker of its platform is free.
+    Workers pass the pages of vacancies they fetch to a single writer thread, which removes duplicates and
+    appends the rest to the storage without reading it again. A task is checkpointed once all of its vacancies
+    have been written. A failed request fails the task, which is then retried after RETRY_DELAY.
+    """
+
+    def __init__(self, tasks: list[CrawlTask], storage_class, file_path: str, workers: dict = None,
+                 checkpoint: Checkpoint = None, clients: dict = None) -> None:
+        """
+        Initializes the scheduler.
+
+        Args:
+            tasks: The tasks of the crawl.
+            storage_class: Storage class the vacancies are written to.
+            file_path: Path to the storage file.
+            workers: Number of workers per API class, DEFAULT_WORKERS for the classes not given.
+            checkpoint: Progress of the crawl, the default checkpoint file if None.
+            clients: API clients by API class, created on demand if not given.
+        """
+        self.storage_class = storage_class
+        self.file_path = file_path
+        self.checkpoint = checkpoint or Checkpoint()
+        self._clients = dict(clients or {})
+        # Tasks due at the same time run in the order of the file, then in the order they were completed
+        self._order = itertools.count()
+        self._queue = []
+        for task in tasks:
+            task.next_run = self.checkpoint.next_run(task.key)
+            self._queue.append((task.next_run, next(self._order), task))
+            if task.api_class not in self._clients:
+                self._clients[task.api_class] = task.api_class()
+        heapq.heapify(self._queue)
+
+        workers = workers or {}
+        self._capacity = {api_class: workers.get(api_class, DEFAULT_WORKERS) for api_class in self._clients}
+        self._in_flight = {api_class: 0 for api_class in self._clients}
+        self._pools = {}
+        self._condition = threading.Condition()
+        self._stopped = threading.Event()
+        # Pages of vacancies on their way to the writer, at most a few per worker
+        self._pages = queue.Queue(maxsize=4 * sum(self._capacity.values()))
+        self._deduplicator = Deduplicator()
+        self._writer_finished = False
+        self.completed = 0
+        self.saved = 0
+        self.error = None
+
+    def _fetch(self, task: CrawlTask) -> None:
+        """Runs a task in a worker of its platform, passing every page of vacancies to the writer"""
+        api = self._clients[task.api_class]
+        spec = task.spec
+        started = time.perf_counter()
+        found = 0
+        error = None
+        page = []
+        try:
+            for vacancy in api.iter_vacancies(spec.title, spec.salary, spec.quantity, spec.quantity):
+                page.append(vacancy)
+                if len(page) == api.MAX_PER_PAGE:
+                    self._pages.put((task, page))
+                    found += len(page)
+                    page = []
+        except Exception as exception:
+            # APIError of a page that could not be fetched after all retries, or an unexpected error
+            error = str(exception)
+        if page:
+            self._pages.put((task, page))
+            found += len(page)
+        # The end of the task, it is checkpointed after the pages before it have been written
+        self._pages.put((task, {'found': found, 'seconds': time.perf_counter() - started, 'error': error}))
+
+    def _write(self) -> None:
+        """
+        Runs the writer. An unexpected error of the writer stops the crawl, the pages still on their way are
+        dropped so that the workers are not blocked on the full queue, and their tasks stay due.
+        """
+        try:
+            self._write_pages()
+        except Exception as exception:
+            self.error = f'{type(exception).__name__}: {exception}'
+            self.stop()
+            while not self._writer_finished:
+                self._writer_finished = self._pages.get()[0] is None
+
+    def _write_pages(self) -> None:
+        """Merges the fetched pages into the storage until the crawl ends, several pages at a time"""
+        saved_by_task = {}
+        while True:
+            items = [self._pages.get()]
+            while True:
+                try:
+                    items.append(self._pages.get_nowait())
+                except queue.Empty:
+                    break
+            self._writer_finished = any(task is None for task, _ in items)
+
+            vacancies = []
+            for task, item in items:
+                if isinstance(item, list):
+                    unique = self._deduplicator.filter(item)
+                    saved_by_task[task.key] = saved_by_task.get(task.key, 0) + len(unique)
+                    vacancies += unique
+            if vacancies and self.error is None:
+                try:
+                    # The deduplicator holds every vacancy of the file, so the new ones are only appended
+                    add_new_vacancies(self.storage_class(vacancies, self.file_path))
+                    self.saved += len(vacancies)
+                except Exception as exception:
+                    # The vacancies are lost, so the crawl stops before their tasks are checkpointed
+                    self.error = f'{type(exception).__name__}: {exception}'
+                    self.stop()
+
+            for task, item in items:
+                if task is None:
+                    return
+                if isinstance(item, dict):
+                    self._complete(task, item, saved_by_task.pop(task.key, 0))
+
+    def _complete(self, task: CrawlTask, result: dict, saved: int) -> None:
+        """Checkpoints a finished task, puts it back into the queue and frees its worker"""
+        if self.error is not None:
+            # The vacancies of the task were not saved, so it stays due
+            with self._condition:
+                self._in_flight[task.api_class] -= 1
+                self._condition.notify()
+            return
+
+        delay = task.refresh if result['error'] is None else min(task.refresh, RETRY_DELAY)
+        task.next_run = time.time() + delay
+        self.checkpoint.complete(task.key, task.next_run, result['found'], saved, result['error'])
+
+        spec = task.spec
+        status = f"error: {result['error']}" if result['error'] else 'ok'
+        print(f"{spec.platform} '{spec.title}'{f' from {spec.salary}' if spec.salary else ''}: "
+              f"found {result['found']}, new {saved}, {result['seconds']:.2f} s, {status}")
+
+        with self._condition:
+            heapq.heappush(self._queue, (task.next_run, next(self._order), task))
+            self._in_flight[task.api_class] -= 1
+            self.completed += 1
+            self._condition.notify()
+
+    def _dispatch(self, now: float) -> None:
+        """Submits the due tasks whose platform has a free worker, the others stay in the queue"""
+        waiting = []
+        while self._queue and self._queue[0][0] <= now:
+            entry = heapq.heappop(self._queue)
+            api_class = entry[2].api_class
+            if self._in_flight[api_class] < self._capacity[api_class]:
+                self._in_flight[api_class] += 1
+                self._pools[api_class].submit(self._fetch, entry[2])
+            else:
+                waiting.append(entry)
+        for entry in waiting:
+            heapq.heappush(self._queue, entry)
+
+    def _next_start(self):
+        """
+        Returns when the next queued task can be started, None if every queued task waits for a worker
+        of its platform, which is then freed with a notification of the condition.
+        """
+        return min((entry[0] for entry in self._queue
+                    if self._in_flight[entry[2].api_class] < self._capacity[entry[2].api_class]), default=None)
+
+    def _has_due_tasks(self, now: float) -> bool:
+        """Checks whether a task is due or running"""
+        return any(self._in_flight.values()) or bool(self._queue and self._queue[0][0] <= now)
+
+    def stop(self) -> None:
+        """
+        Stops the crawl: no more tasks are started, the running ones are finished and saved.
+        """
+        self._stopped.set()
+        with self._condition:
+            self._condition.notify()
+
+    def run(self, once: bool = False) -> int:
+        """
+        Runs the crawl until it is stopped, or until no task is due if once is True.
+
+        Args:
+            once: Run only the tasks that are due now, for running the crawl from cron.
+        Returns:
+            int: Number of completed tasks.
+        """
+        if os.path.isfile(self.file_path):
+            # Vacancies saved by previous runs are not added again
+            for vacancy in self.storage_class([], self.file_path).load_from_file():
+                self._deduplicator.add(vacancy)
+
+        self._pools = {api_class: ThreadPoolExecutor(capacity, thread_name_prefix=f'crawl-{api_class.PLATFORM}')
+                       for api_class, capacity in self._capacity.items()}
+        writer = threading.Thread(target=self._write, name='crawl-writer')
+        writer.start()
+        started = time.time()
+        try:
+            with self._condition:
+                while not self._stopped.is_set():
+                    # In the once mode the tasks rescheduled during the run are left for the next run
+                    now = started if once else time.time()
+                    self._dispatch(now)
+                    if once and not self._has_due_tasks(now):
+                        break
+                    timeout = None
+                    next_start = None if once else self._next_start()
+                    if next_start is not None:
+                        timeout = max(next_start - time.time(), 0)
+                    self._condition.wait(timeout)
+        finally:
+            self._stopped.set()
+            for pool in self._pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+            self._pages.put((None, None))
+            writer.join()
+        return self.completed
+
+
+def _workers(value: str) -> tuple:
+    """Parses a PLATFORM=NUMBER option of the command line"""
+    platform, _, number = value.partition('=')
+    if platform.lower() not in PLATFORMS or not number.isdigit() or int(number) < 1:
+        raise argparse.ArgumentTypeError(f"expected PLATFORM=NUMBER with a platform of {', '.join(PLATFORMS)}")
+    return PLATFORMS[platform.lower()], int(number)
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    Runs the crawl scheduler.
+
+    Args:
+        argv: Command line arguments, sys.argv by default.
+    Returns:
+        int: Exit code.
+    """
+    parser = argparse.ArgumentParser(prog='python -m src.crawl_scheduler',
+                                     description='Keeps the vacancies of a set of searches fresh.')
+    parser.add_argument('job_file', help='CSV file with the header platform,title,salary,quantity,refresh '
+                                         'or JSON file with a list of such objects, refresh is in seconds')
+    parser.add_argument('--storage', choices=sorted(STORAGES), default='jsonlines',
+                        help='storage format of the results, JSON Lines, CSV and SQLite add new vacancies '
+                             'without rewriting the file (default: jsonlines)')
+    parser.add_argument('--output', help='path to the file with the results, the path of the menu by default')
+    parser.add_argument('--refresh', type=float, default=DEFAULT_REFRESH,
+                        help=f'seconds between runs of the searches without their own (default: {DEFAULT_REFRESH})')
+    parser.add_argument('--workers', type=_workers, action='append', default=[], metavar='PLATFORM=NUMBER',
+                        help=f'searches in flight for a platform, e.g. hh=3 (default: {DEFAULT_WORKERS} per platform)')
+    parser.add_argument('--checkpoint', default=CHECKPOINT_PATH, help='file with the progress of the crawl')
+    parser.add_argument('--once', action='store_true',
+                        help='run the due searches once and exit instead of running until interrupted')
+    args = parser.parse_args(argv)
+
+    tasks = read_task_file(args.job_file, args.refresh)
+    storage_name, storage_class, file_path = STORAGES[args.storage]
+    output = args.output or file_path
+    scheduler = CrawlScheduler(tasks, storage_class, output, dict(args.workers), Checkpoint(args.checkpoint))
+
+    started = time.perf_counter()
+    try:
+        scheduler.run(once=args.once)
+    except KeyboardInterrupt:
+        print('Interrupted, the progress is saved')
+    print(f'Searches completed: {scheduler.completed} of {len(tasks)}, new vacancies: {scheduler.saved}, '
+          f'total time: {time.perf_counter() - started:.2f} s')
+    print(f'{storage_name} file: {output}')
+    if scheduler.error:
+        print(f'The crawl stopped, the vacancies could not be saved: {scheduler.error}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
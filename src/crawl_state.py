@@ -0,0 +1,78 @@
+"""Persistent high-water marks of incremental vacancy searches"""
+import json
+import os
+import threading
+
+# The path to save the state of incremental searches
+STATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'saved_vacancies', 'crawl_state.json')
+
+
+class CrawlState:
+    """
+    Stores, for every search query, the publication time of the newest vacancy already fetched.
+    """
+
+    def __init__(self, file_path: str = STATE_PATH) -> None:
+        """
+        Initializes a CrawlState instance and loads the saved marks.
+
+        Args:
+            file_path: Path to the JSON file with the marks.
+        """
+        self.path = file_path
+        self._lock = threading.Lock()
+        self._marks = {}
+        if os.path.isfile(file_path):
+            with open(file_path, 'r', encoding='utf-8') as file:
+                self._marks = json.load(file)
+
+    @staticmethod
+    def make_key(platform: str, name: str, salary: int = None) -> str:
+        """
+        Builds the key of a search query.
+
+        Args:
+            platform: Name of the platform.
+            name: Name of the job vacancy.
+            salary: Desired salary for the vacancy.
+        Returns:
+            Key identifying the query.
+        """
+        return f'{platform}:{name.strip().lower()}:{salary or ""}'
+
+    def get_mark(self, key: str):
+        """
+        Returns the high-water mark of a query.
+
+        Args:
+            key: Key of the query.
+        Returns:
+            Unix timestamp of the newest fetched vacancy or None if the query has never been run.
+        """
+        with self._lock:
+            return self._marks.get(key)
+
+    def set_mark(self, key: str, timestamp: float) -> None:
+        """
+        Moves the high-water mark of a query forward and saves the state.
+
+        Args:
+            key: Key of the query.
+            timestamp: Unix timestamp of the newest fetched vacancy.
+        """
+        with self._lock:
+            if self._marks.get(key) is not None and self._marks[key] >= timestamp:
+                return
+            self._marks[key] = timestamp
+            self.save()
+
+    def save(self) -> None:
+        """
+        Saves the marks to the JSON file.
+        """
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self._marks, file, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,232 @@
+"""Removal of duplicate vacancies found on both platforms or in several searches"""
+import hashlib
+import operator
+import struct
+from collections import deque
+
+from src.search_index import tokenize
+
+# Value of a signature slot no shingle has fallen into
+_EMPTY = 1 << 64
+# Legal forms dropped from employer names, so 'ООО «Яндекс»' on one platform and 'Яндекс' on the other are equal
+_LEGAL_FORMS = frozenset({'ооо', 'оао', 'зао', 'пао', 'ао', 'ип', 'нко', 'ано', 'гуп', 'муп', 'фгуп',
+                          'llc', 'ltd', 'inc', 'gmbh', 'corp'})
+
+
+def _hash(value: str) -> int:
+    """Returns a stable 64-bit hash of a string, unlike hash() it does not change between runs"""
+    return struct.unpack('<Q', hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest())[0]
+
+
+def url_key(vacancy) -> int:
+    """
+    Returns the hash of the vacancy URL used for exact duplicates.
+
+    Args:
+        vacancy: Vacancy object or vacancy dictionary.
+    Returns:
+        The hash of the URL.
+    """
+    return _hash(vacancy['vacancy_url'].strip().rstrip('/').lower())
+
+
+def employer_words(employer: str) -> list[str]:
+    """
+    Splits an employer name into normalized words without the legal form and the quotes.
+
+    Args:
+        employer: The employer name.
+    Returns:
+        List of normalized words.
+    """
+    return [word for word in tokenize(employer) if word not in _LEGAL_FORMS]
+
+
+def shingles(vacancy, size: int = 2) -> set[str]:
+    """
+    Splits the title, the normalized employer and the city of a vacancy into overlapping word sequences.
+    The requirements are left out: HeadHunter returns a short snippet of them and SuperJob the whole description,
+    so they differ even for the same vacancy published on both platforms.
+    The city keeps the same job offered by one employer in different cities apart.
+
+    Args:
+        vacancy: Vacancy object or vacancy dictionary.
+        size: Number of words in a shingle.
+    Returns:
+        Set of shingles, the words of a short text if it has fewer words than the size.
+    """
+    words = tokenize(vacancy['title'] or '') + employer_words(vacancy['employer'] or '')
+    words += tokenize(vacancy['city'] or '')
+    if len(words) < size:
+        return set(words)
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """
+    Computes MinHash signatures: the estimated share of equal values of two signatures is
+    the Jaccard similarity of the shingle sets.
+
+    One permutation hashing is used: every shingle is hashed once, the hash selects a slot of the
+    signature and the slot keeps the minimum of the rest of the hashes. Empty slots borrow the value
+    of the next filled slot. So a signature costs O(shingles) instead of O(shingles * num_perm).
+    """
+
+    def __init__(self, num_perm: int = 64) -> None:
+        """
+        Initializes a MinHasher.
+
+        Args:
+            num_perm: Length of a signature.
+        """
+        self.num_perm = num_perm
+
+    def signature(self, tokens: set[str]) -> tuple[int, ...]:
+        """
+        Computes the signature of a set of shingles.
+
+        Args:
+            tokens: Set of shingles.
+        Returns:
+            The signature, a tuple of num_perm integers.
+        """
+        num_perm = self.num_perm
+        slots = [_EMPTY] * num_perm
+        for token in tokens:
+            value, slot = divmod(_hash(token), num_perm)
+            if value < slots[slot]:
+                slots[slot] = value
+
+        filled = [slot for slot in range(num_perm) if slots[slot] != _EMPTY]
+        if filled and len(filled) < num_perm:
+            # Each empty slot takes the value of the closest filled slot to the right, cyclically
+            source = filled[0]
+            for slot in reversed(range(num_perm)):
+                if slots[slot] != _EMPTY:
+                    source = slot
+                elif source != slot:
+                    slots[slot] = slots[source]
+        return tuple(slots)
+
+    @staticmethod
+    def similarity(first: tuple, second: tuple) -> float:
+        """Estimates the Jaccard similarity of two signatures"""
+        return sum(map(operator.eq, first, second)) / len(first)
+
+
+class Deduplicator:
+    """
+    Detects exact duplicates by the hash of the vacancy URL and near duplicates by MinHash
+    signatures of title, normalized employer and city, found with an LSH index. So one vacancy published
+    on both platforms is kept once, as is a job one employer offers in one city under several URLs.
+
+    The signature is split into bands, vacancies with an equal band share a bucket and only
+    they are compared, by the exact Jaccard similarity of their shingles: the sets are small,
+    so the MinHash estimate would be too coarse to decide. A bucket keeps the latest BUCKET_SIZE vacancies, so a vacancy is compared
+    with a bounded number of others and processing n vacancies takes O(n) time even when
+    many vacancies have the same title and employer.
+    The first added vacancy of a group of duplicates is kept.
+    """
+
+    BUCKET_SIZE = 8
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 16) -> None:
+        """
+        Initializes an empty Deduplicator.
+
+        Args:
+            threshold: Jaccard similarity from which vacancies are near duplicates.
+            num_perm: Length of the MinHash signatures.
+            bands: Number of LSH bands, num_perm must be divisible by it.
+        """
+        if num_perm % bands:
+            raise ValueError('num_perm must be divisible by bands')
+        self.threshold = threshold
+        self._hasher = MinHasher(num_perm)
+        self._bands = bands
+        self._rows = num_perm // bands
+        self._urls = set()
+        self._shingles = []
+        self._buckets = {}
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    def __len__(self) -> int:
+        """Returns the number of unique vacancies seen"""
+        return len(self._urls)
+
+    def _band_keys(self, signature: tuple) -> list:
+        """Returns the bucket keys of the bands of a signature"""
+        rows = self._rows
+        return [(band, signature[band * rows:(band + 1) * rows]) for band in range(self._bands)]
+
+    def _find_similar(self, tokens: set, band_keys: list) -> bool:
+        """Checks whether a vacancy sharing a bucket with the shingles is a near duplicate"""
+        checked = set()
+        for band_key in band_keys:
+            for candidate in self._buckets.get(band_key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                other = self._shingles[candidate]
+                if len(tokens & other) >= self.threshold * len(tokens | other):
+                    return True
+        return False
+
+    def add(self, vacancy) -> bool:
+        """
+        Adds a vacancy unless it duplicates one of the vacancies added before.
+
+        Args:
+            vacancy: Vacancy object or vacancy dictionary.
+        Returns:
+            True if the vacancy is unique, False if it is a duplicate.
+        """
+        key = url_key(vacancy)
+        if key in self._urls:
+            self.exact_duplicates += 1
+            return False
+
+        tokens = shingles(vacancy)
+        band_keys = self._band_keys(self._hasher.signature(tokens))
+        if self._find_similar(tokens, band_keys):
+            self.near_duplicates += 1
+            return False
+
+        self._urls.add(key)
+        position = len(self._shingles)
+        self._shingles.append(tokens)
+        for band_key in band_keys:
+            bucket = self._buckets.get(band_key)
+            if bucket is None:
+                bucket = self._buckets[band_key] = deque(maxlen=self.BUCKET_SIZE)
+            bucket.append(position)
+        return True
+
+    def filter(self, vacancies) -> list:
+        """
+        Keeps the vacancies that are not duplicates of each other or of the vacancies added before.
+
+        Args:
+            vacancies: Iterable of Vacancy objects or vacancy dictionaries.
+        Returns:
+            List of unique vacancies in the original order.
+        """
+        return [vacancy for vacancy in vacancies if self.add(vacancy)]
+
+
+def deduplicate(vacancies, known=(), threshold: float = 0.8) -> list:
+    """
+    Removes exact and near duplicates from the vacancies.
+
+    Args:
+        vacancies: Iterable of Vacancy objects or vacancy dictionaries.
+        known: Vacancies found before, for example the saved ones, duplicates of which are removed too.
+        threshold: Jaccard similarity from which vacancies are near duplicates.
+    Returns:
+        List of unique vacancies in the original order.
+    """
+    deduplicator = Deduplicator(threshold)
+    for vacancy in known:
+        deduplicator.add(vacancy)
+    return deduplicator.filter(vacancies)
@@ -1,17 +1,132 @@
 import csv
+import heapq
 import json
-from typing import Union
+import math
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+import textwrap
+import threading
+from array import array
+from contextlib import closing, contextmanager
+from typing import Iterator, Union
 
 from src.abstract_classes.abstract_saver import GeneralStorage
 from src.models.vacancy import Vacancy
+from src.models.vacancy_batch import VacancyBatch
+from src.salary_index import get_salary_index, parse_salary
+from src.search_index import VacancyIndex, city_matcher, get_search_index
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pc = pq = None
+
+NAN = float('nan')
+
+# Keys by which top_vacancies ranks vacancies
+RANKING_KEYS = ('average', 'salary_from', 'salary_to')
+
+
+def ranking_key(key: str):
+    """
+    Returns the function computing the rank of a vacancy by salary.
+    The average is computed like Vacancy.salary_comparison (0 if a bound is missing),
+    vacancies with a missing salary_from or salary_to are ranked last by that key.
+
+    Args:
+        key: One of RANKING_KEYS.
+    Returns:
+        Function of a vacancy returning a float.
+    """
+    if key not in RANKING_KEYS:
+        raise ValueError(f"Ranking key must be one of {RANKING_KEYS}")
+
+    if key == 'average':
+        def rank(vacancy):
+            salary_from, salary_to = parse_salary(vacancy['salary_from']), parse_salary(vacancy['salary_to'])
+            return 0 if salary_from is None or salary_to is None else (salary_from + salary_to) / 2
+    else:
+        def rank(vacancy):
+            value = parse_salary(vacancy[key])
+            return -math.inf if value is None else value
+    return rank
+
+
+def top_by_salary(vacancies, top_number: int, key: str = 'average') -> list:
+    """
+    Selects the N vacancies with the highest salary in a single pass with a bounded heap, O(n log N).
+    Vacancies with equal salaries keep their order.
+
+    Args:
+        vacancies: Iterable of vacancies, consumed lazily.
+        top_number: The number of top N vacancies to retrieve.
+        key: One of RANKING_KEYS.
+    Returns:
+        List of top N vacancies, the highest salary first.
+    """
+    return heapq.nlargest(top_number, vacancies, key=ranking_key(key))
+
+
+def add_new_vacancies(storage) -> int:
+    """
+    Adds vacancies known not to be in the file of a storage yet, for example the ones left by a Deduplicator
+    seeded with the file. Formats that can append write them without reading the file, the others merge them.
+
+    Args:
+        storage: Storage whose parse_data holds the new vacancies.
+    Returns:
+        Number of added vacancies.
+    """
+    if hasattr(storage, 'append_to_file'):
+        return storage.append_to_file()
+    return storage.merge_to_file()
+
+
+def search_vacancies(storage, query: str, match_all: bool = True) -> list:
+    """
+    Finds the vacancies of a storage whose title or requirements contain the words of the query.
+    Storages without a search of their own are searched with an index kept in memory
+    until their files change.
+
+    Args:
+        storage: Storage of a file with vacancies.
+        query: Words to search for.
+        match_all: True to find vacancies containing all words, False for any of them.
+    Returns:
+        List of matching vacancies.
+    """
+    if hasattr(storage, 'search_vacancies'):
+        return storage.search_vacancies(query, match_all)
+    path = getattr(storage, 'path', None) or getattr(storage, 'filename', None) or getattr(storage, 'db_path', None)
+    paths = (path, getattr(storage, 'tombstones_path', None))
+    return get_search_index(tuple(filter(None, paths)), storage.load_from_file).search(query, match_all)
 
 
 class JsonSaver(GeneralStorage):
     """
     Implementation of General Storage class for saving and loading data,
     as well as performing various operations on job vacancies in JSON format.
+
+    Loaded files are kept in memory and shared by all instances, a file is decoded again
+    only when its modification time or size changes. An inverted index for city and keyword search
+    is built on the first search and updated incrementally on delete and merge. A columnar VacancyBatch
+    of the salaries is built on the first ranking, so top_vacancies is vectorized with NumPy.
     """
 
+    # Absolute file path -> [(modification time, size), loaded data, search index or None, salary batch or None]
+    _loaded_files = {}
+    _loaded_files_lock = threading.Lock()
+
     def __init__(self, parse_data, file_path: str) -> None:
         """
         Initializes a JsonSaver instance.
@@ -26,20 +141,125 @@ class JsonSaver(GeneralStorage):
     def save_to_file(self):
         """
         Saves the parse_data to a JSON file.
+        Vacancies are written one at a time, so parse_data may be a generator of vacancies.
         """
         with open(self.path, 'w', encoding='utf-8') as file:
-            json.dump(self.parse_data, file, indent=4, ensure_ascii=False, default=lambda x: x.to_dict())
+            file.write('[')
+            separator = '\n'
+            for vacancy in self.parse_data:
+                item = json.dumps(vacancy, indent=4, ensure_ascii=False, default=lambda x: x.to_dict())
+                file.write(separator + textwrap.indent(item, '    '))
+                separator = ',\n'
+            file.write('\n]' if separator != '\n' else ']')
+        self._forget_loaded()
+
+    def merge_to_file(self) -> int:
+        """
+        Adds the vacancies of parse_data that are not in the JSON file yet (by vacancy URL) and saves the file.
+
+        Returns:
+            Number of added vacancies.
+        """
+        saved_data = self.load_from_file() if os.path.isfile(self.path) else []
+        index = self._loaded_index()
+        saved_urls = {vacancy['vacancy_url'] for vacancy in saved_data}
+        new_vacancies = [vacancy for vacancy in self.parse_data if vacancy['vacancy_url'] not in saved_urls]
+        new_vacancies = [vacancy.to_dict() if isinstance(vacancy, Vacancy) else vacancy for vacancy in new_vacancies]
+
+        self.parse_data = saved_data + new_vacancies
+        self.save_to_file()
+        if index is not None:
+            index.add(new_vacancies)
+        self._remember_loaded(self.parse_data, index)
+        return len(new_vacancies)
 
     def load_from_file(self) -> list[Vacancy]:
         """
-        Loads data from the JSON file.
+        Loads data from the JSON file, or returns the data loaded before if the file has not changed since.
 
         Returns:
-            Loaded data from the file.
+            Loaded data from the file. The list is shared between calls and must not be modified.
         """
-        with open(self.path, 'r', encoding='utf-8') as file:
+        path = os.path.abspath(self.path)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._loaded_files_lock:
+            loaded = self._loaded_files.get(path)
+        if loaded is not None and loaded[0] == signature:
+            return loaded[1]
+
+        with open(path, 'r', encoding='utf-8') as file:
             data = json.load(file)
-            return data
+
+        with self._loaded_files_lock:
+            self._loaded_files[path] = [signature, data, None, None]
+        return data
+
+    def _loaded_index(self):
+        """
+        Returns the search index of the file if it has been built for the current content, otherwise None.
+        """
+        if not os.path.isfile(self.path):
+            return None
+        self.load_from_file()
+        with self._loaded_files_lock:
+            loaded = self._loaded_files.get(os.path.abspath(self.path))
+        return loaded[2] if loaded is not None else None
+
+    def _loaded_with(self, slot: int, build) -> tuple:
+        """
+        Returns the loaded data of the file with a structure built from it, building the structure
+        on the first call for the current content.
+
+        Args:
+            slot: Position of the structure in the entry of _loaded_files.
+            build: Function of the loaded data returning the structure.
+        Returns:
+            Tuple of the loaded data and the structure.
+        """
+        data = self.load_from_file()
+        with self._loaded_files_lock:
+            loaded = self._loaded_files.get(os.path.abspath(self.path))
+            if loaded is not None and loaded[1] is data:
+                if loaded[slot] is None:
+                    loaded[slot] = build(data)
+                return data, loaded[slot]
+        # The file changed while it was loaded, the structure is used for this call only
+        return data, build(data)
+
+    @staticmethod
+    def _build_index(data: list) -> VacancyIndex:
+        """Builds the search index of the loaded data"""
+        index = VacancyIndex()
+        index.add(data)
+        return index
+
+    def _search_index(self) -> VacancyIndex:
+        """
+        Returns the search index of the file, building it on the first call for the current content.
+        """
+        return self._loaded_with(2, self._build_index)[1]
+
+    def _remember_loaded(self, data: list, index) -> None:
+        """
+        Keeps the data just written to the file and its updated search index, so they are not read again.
+
+        Args:
+            data: List of vacancy dictionaries written to the file.
+            index: Search index of the data or None.
+        """
+        path = os.path.abspath(self.path)
+        stat = os.stat(path)
+        with self._loaded_files_lock:
+            self._loaded_files[path] = [(stat.st_mtime_ns, stat.st_size), data, index, None]
+
+    def _forget_loaded(self) -> None:
+        """
+        Drops the data loaded from the file, so the next load reads the file again.
+        """
+        with self._loaded_files_lock:
+            self._loaded_files.pop(os.path.abspath(self.path), None)
 
     def get_vacancies_by_salary(self, sal_criteria: int) -> Union[list[Vacancy], str]:
         """
@@ -50,32 +270,49 @@ class JsonSaver(GeneralStorage):
         Returns:
             list: List of matching vacancies or an empty list if no matches found.
         """
-        data_get_vac = self.load_from_file()
-        matching_vacancies = []
-        for vacancy in data_get_vac:
-            if vacancy['salary_from'] is not None and vacancy['salary_from'] >= sal_criteria:
-                matching_vacancies.append(vacancy)
-        if not matching_vacancies:
+        return self.get_vacancies_by_salary_range(min_salary=sal_criteria)
+
+    def get_vacancies_by_salary_range(self, min_salary: float = None, max_salary: float = None,
+                                      key: str = 'salary_from') -> list[Vacancy]:
+        """
+        Retrieves vacancies whose salary is within the given bounds using the sorted salary index.
+
+        Args:
+            min_salary: Lower bound of the salary, inclusive, no bound if None.
+            max_salary: Upper bound of the salary, inclusive, no bound if None.
+            key: Salary to compare: 'salary_from', 'salary_to' or 'average'.
+        Returns:
+            list: List of matching vacancies in file order or an empty list if no matches found.
+        """
+        data = self.load_from_file()
+        if not data:
             return []
-        return matching_vacancies
+        positions = get_salary_index(self.path, lambda: data).range(key, min_salary, max_salary)
+        return [data[position] for position in positions]
 
     def get_vacancies_by_city(self, city_criteria: str) -> Union[list[Vacancy], str]:
         """
-        Retrieves vacancies based on city criteria.
+        Retrieves vacancies based on city criteria using the city index.
+        Cities are compared ignoring case, hyphens and the difference between 'е' and 'ё'.
 
         Args:
             city_criteria: The city criteria to filter vacancies.
         Returns:
             list: List of matching vacancies or an empty list if no matches found.
         """
-        data_city = self.load_from_file()
-        matching_vacancies = []
-        for vacancy in data_city:
-            if city_criteria.title() in vacancy['city']:
-                matching_vacancies.append(vacancy)
-        if not matching_vacancies:
-            return []
-        return matching_vacancies
+        return self._search_index().find_by_city(city_criteria)
+
+    def search_vacancies(self, query: str, match_all: bool = True) -> list[Vacancy]:
+        """
+        Retrieves vacancies whose title or requirements contain the words of the query.
+
+        Args:
+            query: Words to search for.
+            match_all: True to find vacancies containing all words, False for any of them.
+        Returns:
+            list: List of matching vacancies or an empty list if no matches found.
+        """
+        return self._search_index().search(query, match_all)
 
     def delete_vacancy(self, remove_criteria: str):
         """
@@ -85,30 +322,46 @@ class JsonSaver(GeneralStorage):
             remove_criteria: Criteria to identify the vacancy to be deleted.
         """
         data_del = self.load_from_file()
+        index = self._loaded_index()
         self.parse_data = [vacancy for vacancy in data_del if vacancy['title'] != remove_criteria]
         self.save_to_file()
+        if index is not None:
+            index.remove_title(remove_criteria)
+        self._remember_loaded(self.parse_data, index)
 
-    def top_vacancies(self, top_number: int) -> list[Vacancy]:
+    def top_vacancies(self, top_number: int, key: str = 'average') -> list[Vacancy]:
         """
-        Retrieves the top N vacancies from the storage.
+        Retrieves the top N vacancies from the storage ranked by salary
+        using the salary columns of the VacancyBatch of the file.
 
         Args:
             top_number: The number of top N vacancies to retrieve.
+            key: Salary to rank by: 'average', 'salary_from' or 'salary_to'.
         Returns:
-            List of top N vacancies.
+            List of top N vacancies, the highest salary first.
         """
-        data = self.load_from_file()
-        new_data = data[:top_number]
-
-        return new_data
+        if key not in RANKING_KEYS:
+            raise ValueError(f"Ranking key must be one of {RANKING_KEYS}")
+        data, batch = self._loaded_with(3, VacancyBatch.from_vacancies)
+        # A missing average ranks as 0 like Vacancy.salary_comparison, a missing bound ranks last
+        missing = 0 if key == 'average' else -math.inf
+        indices = batch.top_indices(top_number, 'salary_comparison' if key == 'average' else key, missing)
+        return [data[int(index)] for index in indices]
 
 
 class CSVSaver(GeneralStorage):
     """
     Implementation of General Storage class for saving and loading data,
     as well as performing various operations on job vacancies in CSV format.
+
+    The rows parsed for salary queries are kept in memory and shared by all instances,
+    a file is parsed again only when its modification time or size changes.
     """
 
+    # Absolute file path -> ((modification time, size), parsed rows)
+    _loaded_files = {}
+    _loaded_files_lock = threading.Lock()
+
     def __init__(self, parse_data, filename: str) -> None:
         """
         Initializes a CSVSaver instance.
@@ -132,6 +385,46 @@ class CSVSaver(GeneralStorage):
             for vacancy in self.parse_data:
                 writer.writerow(vacancy.to_dict())
 
+    def merge_to_file(self) -> int:
+        """
+        Appends the vacancies of parse_data that are not in the CSV file yet (by vacancy URL) to the file.
+
+        Returns:
+            Number of added vacancies.
+        """
+        headers = ['title', 'vacancy_url', 'salary_from', 'salary_to', 'employer', 'city', 'requirements']
+
+        file_exists = os.path.isfile(self.filename)
+        saved_urls = {vacancy['vacancy_url'] for vacancy in self.load_from_file()} if file_exists else set()
+        new_vacancies = [vacancy for vacancy in self.parse_data if vacancy['vacancy_url'] not in saved_urls]
+
+        with open(self.filename, 'a', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=headers)
+            if not file_exists:
+                writer.writeheader()
+            for vacancy in new_vacancies:
+                writer.writerow(vacancy.to_dict())
+        return len(new_vacancies)
+
+    def append_to_file(self) -> int:
+        """
+        Appends the parse_data to the end of the CSV file without reading it.
+        The vacancies must not be in the file yet.
+
+        Returns:
+            Number of appended vacancies.
+        """
+        headers = ['title', 'vacancy_url', 'salary_from', 'salary_to', 'employer', 'city', 'requirements']
+
+        file_exists = os.path.isfile(self.filename)
+        with open(self.filename, 'a', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=headers)
+            if not file_exists:
+                writer.writeheader()
+            for vacancy in self.parse_data:
+                writer.writerow(vacancy.to_dict() if isinstance(vacancy, Vacancy) else vacancy)
+        return len(self.parse_data)
+
     def load_from_file(self) -> list[Vacancy]:
         """
         Loads data from the CSV file.
@@ -148,6 +441,27 @@ class CSVSaver(GeneralStorage):
 
         return load_data
 
+    def _loaded_rows(self) -> list[dict]:
+        """
+        Returns the rows of the CSV file, parsing the file only if it has changed since the previous call.
+
+        Returns:
+            Rows of the file. The list is shared between calls and must not be modified.
+        """
+        path = os.path.abspath(self.filename)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._loaded_files_lock:
+            loaded = self._loaded_files.get(path)
+        if loaded is not None and loaded[0] == signature:
+            return loaded[1]
+
+        data = self.load_from_file()
+        with self._loaded_files_lock:
+            self._loaded_files[path] = (signature, data)
+        return data
+
     def get_vacancies_by_salary(self, sal_criteria: int) -> Union[list[Vacancy], str]:
         """
         Retrieves vacancies based on salary criteria.
@@ -157,18 +471,30 @@ class CSVSaver(GeneralStorage):
         Returns:
             list: List of matching vacancies or an empty list if no matches found.
         """
-        data_get_vac = self.load_from_file()
-        matching_vacancies = []
-        for vacancy in data_get_vac:
-            if vacancy['salary_from'].isdigit() and int(vacancy['salary_from']) >= sal_criteria:
-                matching_vacancies.append(vacancy)
-        if not matching_vacancies:
-            return []
-        return matching_vacancies
+        return self.get_vacancies_by_salary_range(min_salary=sal_criteria)
+
+    def get_vacancies_by_salary_range(self, min_salary: float = None, max_salary: float = None,
+                                      key: str = 'salary_from') -> list[Vacancy]:
+        """
+        Retrieves vacancies whose salary is within the given bounds using the sorted salary index.
+        Salaries are compared as numbers, so fractional salaries are matched too.
+        The file is parsed only when it changes, a query then costs a lookup in the index.
+
+        Args:
+            min_salary: Lower bound of the salary, inclusive, no bound if None.
+            max_salary: Upper bound of the salary, inclusive, no bound if None.
+            key: Salary to compare: 'salary_from', 'salary_to' or 'average'.
+        Returns:
+            list: List of matching vacancies in file order or an empty list if no matches found.
+        """
+        data = self._loaded_rows()
+        positions = get_salary_index(self.filename, lambda: data).range(key, min_salary, max_salary)
+        return [data[position] for position in positions]
 
     def get_vacancies_by_city(self, city_criteria: str) -> Union[list[Vacancy], str]:
         """
         Retrieves vacancies based on city criteria.
+        Cities are compared ignoring case, hyphens and the difference between 'е' and 'ё'.
 
         Args:
             city_criteria: The city criteria to filter vacancies.
@@ -176,9 +502,10 @@ class CSVSaver(GeneralStorage):
             list: List of matching vacancies or an empty list if no matches found.
         """
         data_city = self.load_from_file()
+        matches = city_matcher(city_criteria)
         matching_vacancies = []
         for vacancy in data_city:
-            if city_criteria.title() in vacancy['city']:
+            if matches(vacancy['city']):
                 matching_vacancies.append(vacancy)
         if not matching_vacancies:
             return []
@@ -201,16 +528,1109 @@ class CSVSaver(GeneralStorage):
             writer.writeheader()
             writer.writerows(remaining_vacancies)
 
-    def top_vacancies(self, top_number: int) -> list[Vacancy]:
+    def top_vacancies(self, top_number: int, key: str = 'average') -> list[Vacancy]:
         """
-        Retrieves the top N vacancies from the storage.
+        Retrieves the top N vacancies from the storage ranked by salary,
+        streaming the rows of the CSV file through a bounded heap.
 
         Args:
             top_number: The number of top N vacancies to retrieve.
+            key: Salary to rank by: 'average', 'salary_from' or 'salary_to'.
         Returns:
-            List of top N vacancies.
+            List of top N vacancies, the highest salary first.
         """
-        data = self.load_from_file()
-        new_data = data[:top_number]
+        with open(self.filename, 'r', newline='', encoding='utf-8') as csvfile:
+            return top_by_salary(csv.DictReader(csvfile), top_number, key)
+
+
+def _decode_salary(value: str):
+    """Converts a salary read from a CSV file to int or float, None if it is missing"""
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+class StreamingCSVSaver(CSVSaver):
+    """
+    CSV storage that never holds the whole file in memory.
+
+    The file has the same format as the one of CSVSaver. Rows are read in chunks of CHUNK_SIZE and filters
+    are applied to the raw rows during the read, so only matching rows are decoded into dictionaries
+    with numeric salaries. Salary queries pick the rows found in the sorted salary index without converting
+    the salaries of the file again, top_vacancies converts only the salary columns to rank the rows.
+    Deletes are written to a temporary file which atomically replaces the original one.
+    """
+
+    CHUNK_SIZE = 10_000
+    HEADERS = ['title', 'vacancy_url', 'salary_from', 'salary_to', 'employer', 'city', 'requirements']
+    # Positions of the columns in a raw row
+    SALARY_FROM, SALARY_TO, CITY = 2, 3, 5
+
+    def _rows(self) -> Iterator[list]:
+        """
+        Reads the rows of the file as lists of strings, the header is skipped.
+        """
+        with open(self.filename, 'r', newline='', encoding='utf-8') as csvfile:
+            reader = csv.reader(csvfile)
+            next(reader, None)
+            yield from reader
+
+    @staticmethod
+    def _decode(row: list) -> dict:
+        """
+        Converts a raw row to a vacancy dictionary with numeric salaries.
+        """
+        title, vacancy_url, salary_from, salary_to, employer, city, requirements = row
+        return {'title': title, 'vacancy_url': vacancy_url,
+                'salary_from': _decode_salary(salary_from), 'salary_to': _decode_salary(salary_to),
+                'employer': employer, 'city': city, 'requirements': requirements}
+
+    def iter_chunks(self, predicate=None, chunk_size: int = None) -> Iterator[list[dict]]:
+        """
+        Reads the vacancies of the file chunk by chunk.
+
+        Args:
+            predicate: Function of a raw row, a list of strings in the order of HEADERS. Only the rows
+                for which it returns True are decoded and read. All vacancies if None.
+            chunk_size: Maximum number of vacancies in a chunk, CHUNK_SIZE by default.
+        Returns:
+            Generator of lists of vacancy dictionaries with numeric salaries, in file order.
+        """
+        chunk_size = chunk_size or self.CHUNK_SIZE
+        chunk = []
+        for row in self._rows():
+            if predicate is None or predicate(row):
+                chunk.append(self._decode(row))
+                if len(chunk) == chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    def iter_vacancies(self, predicate=None) -> Iterator[dict]:
+        """
+        Reads the vacancies of the file one at a time.
+
+        Args:
+            predicate: Function of a raw row, a list of strings in the order of HEADERS. Only the rows
+                for which it returns True are decoded and read. All vacancies if None.
+        Returns:
+            Generator of vacancy dictionaries with numeric salaries, in file order.
+        """
+        for chunk in self.iter_chunks(predicate):
+            yield from chunk
+
+    def merge_to_file(self) -> int:
+        """
+        Appends the vacancies of parse_data that are not in the CSV file yet (by vacancy URL) to the file.
+        Only the URL column of the file is kept in memory.
+
+        Returns:
+            Number of added vacancies.
+        """
+        file_exists = os.path.isfile(self.filename)
+        saved_urls = {row[1] for row in self._rows()} if file_exists else set()
+        new_vacancies = [vacancy for vacancy in self.parse_data if vacancy['vacancy_url'] not in saved_urls]
+
+        with open(self.filename, 'a', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=self.HEADERS)
+            if not file_exists:
+                writer.writeheader()
+            for vacancy in new_vacancies:
+                writer.writerow(vacancy.to_dict())
+        return len(new_vacancies)
+
+    def load_from_file(self) -> list[dict]:
+        """
+        Loads data from the CSV file.
+
+        Returns:
+            List of vacancy dictionaries with numeric salaries.
+        """
+        return list(self.iter_vacancies())
+
+    def get_vacancies_by_salary_range(self, min_salary: float = None, max_salary: float = None,
+                                      key: str = 'salary_from') -> list[dict]:
+        """
+        Retrieves vacancies whose salary is within the given bounds using the sorted salary index.
+        The index is built in one streaming pass when the file changes, then only the rows it finds
+        are decoded.
+
+        Args:
+            min_salary: Lower bound of the salary, inclusive, no bound if None.
+            max_salary: Upper bound of the salary, inclusive, no bound if None.
+            key: Salary to compare: 'salary_from', 'salary_to' or 'average'.
+        Returns:
+            list: List of matching vacancies in file order or an empty list if no matches found.
+        """
+        if not os.path.isfile(self.filename):
+            return []
+        positions = get_salary_index(self.filename, self.iter_vacancies).range(key, min_salary, max_salary)
+        if not positions:
+            return []
+
+        wanted = iter(positions)
+        next_position = next(wanted)
+        matching_vacancies = []
+        for position, row in enumerate(self._rows()):
+            if position != next_position:
+                continue
+            matching_vacancies.append(self._decode(row))
+            next_position = next(wanted, None)
+            if next_position is None:
+                break
+        return matching_vacancies
+
+    def get_vacancies_by_city(self, city_criteria: str) -> list[dict]:
+        """
+        Retrieves vacancies based on city criteria, the criteria is checked while the file is read.
+        Cities are compared ignoring case, hyphens and the difference between 'е' and 'ё'.
+
+        Args:
+            city_criteria: The city criteria to filter vacancies.
+        Returns:
+            list: List of matching vacancies or an empty list if no matches found.
+        """
+        matches = city_matcher(city_criteria)
+        return list(self.iter_vacancies(lambda row: matches(row[self.CITY])))
+
+    def delete_vacancy(self, remove_criteria: str):
+        """
+        Deletes the vacancies with the given title. The remaining rows are streamed to a temporary file,
+        which then replaces the original one, so the file is never left half-written.
+
+        Args:
+            remove_criteria: Title of the vacancies to delete.
+        """
+        tmp_path = f'{self.filename}.tmp'
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(self.HEADERS)
+            writer.writerows(row for row in self._rows() if row[0] != remove_criteria)
+        os.replace(tmp_path, self.filename)
+
+    def top_vacancies(self, top_number: int, key: str = 'average') -> list[dict]:
+        """
+        Retrieves the top N vacancies from the storage ranked by salary,
+        streaming the raw rows of the file through a bounded heap. Only the salary columns are converted
+        to rank a row, the top N rows are decoded into dictionaries.
+
+        Args:
+            top_number: The number of top N vacancies to retrieve.
+            key: Salary to rank by: 'average', 'salary_from' or 'salary_to'.
+        Returns:
+            List of top N vacancies, the highest salary first.
+        """
+        rank = ranking_key(key)
+        salary_from, salary_to = self.SALARY_FROM, self.SALARY_TO
+        rows = heapq.nlargest(top_number, self._rows(),
+                              key=lambda row: rank({'salary_from': row[salary_from], 'salary_to': row[salary_to]}))
+        return [self._decode(row) for row in rows]
+
+
+class SQLiteSaver(GeneralStorage):
+    """
+    Implementation of General Storage class for saving and loading data,
+    as well as performing various operations on job vacancies in an SQLite database.
+
+    Vacancies are stored in a table with indexes on salary_from, salary_to, salary_comparison, city,
+    title and vacancy_url, so lookups and deletes touch only the matching rows instead of the whole file.
+    """
+
+    _SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS vacancies (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            vacancy_url TEXT NOT NULL,
+            salary_from NUMERIC,
+            salary_to NUMERIC,
+            salary_comparison NUMERIC NOT NULL,
+            employer TEXT NOT NULL,
+            city TEXT NOT NULL,
+            requirements TEXT NOT NULL
+        )""",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_vacancies_url ON vacancies (vacancy_url)",
+        "CREATE INDEX IF NOT EXISTS idx_vacancies_salary_from ON vacancies (salary_from)",
+        "CREATE INDEX IF NOT EXISTS idx_vacancies_salary_to ON vacancies (salary_to)",
+        "CREATE INDEX IF NOT EXISTS idx_vacancies_salary_comparison ON vacancies (salary_comparison)",
+        "CREATE INDEX IF NOT EXISTS idx_vacancies_city ON vacancies (city)",
+        "CREATE INDEX IF NOT EXISTS idx_vacancies_title ON vacancies (title)",
+    )
+    _COLUMNS = 'title, vacancy_url, salary_from, salary_to, employer, city, requirements'
+
+    def __init__(self, parse_data, db_path: str) -> None:
+        """
+        Initializes a SQLiteSaver instance and creates the schema if the database is new.
+
+        Args:
+            parse_data: Data to be saved or loaded.
+            db_path: Path to the SQLite database file.
+        """
+        self.parse_data = parse_data
+        self.db_path = db_path
+        with closing(self._connect()) as connection, connection:
+            for statement in self._SCHEMA:
+                connection.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Opens a connection to the database that returns rows as dictionaries.
+        """
+        connection = sqlite3.connect(self.db_path)
+        connection.row_factory = lambda cursor, row: {column[0]: value for column, value in zip(cursor.description, row)}
+        return connection
+
+    def _select(self, where: str = '', params: tuple = (), suffix: str = 'ORDER BY id') -> list[dict]:
+        """
+        Selects vacancies matching the condition.
+
+        Args:
+            where: SQL condition, all vacancies if empty.
+            params: Parameters of the condition.
+            suffix: Ordering and limit of the query.
+        Returns:
+            List of vacancy dictionaries.
+        """
+        query = f"SELECT {self._COLUMNS} FROM vacancies {f'WHERE {where}' if where else ''} {suffix}"
+        with closing(self._connect()) as connection:
+            return connection.execute(query, params).fetchall()
+
+    @staticmethod
+    def _average_salary(vacancy) -> float:
+        """
+        Calculates the average salary of a vacancy the same way as Vacancy.salary_comparison.
+        """
+        if vacancy['salary_from'] is None or vacancy['salary_to'] is None:
+            return 0
+        return (vacancy['salary_from'] + vacancy['salary_to']) / 2
+
+    def _insert(self, connection: sqlite3.Connection) -> int:
+        """
+        Inserts the vacancies of parse_data that are not in the database yet (by vacancy URL).
+
+        Args:
+            connection: Connection with an open transaction.
+        Returns:
+            Number of inserted vacancies.
+        """
+        rows = ((vacancy['title'], vacancy['vacancy_url'], vacancy['salary_from'], vacancy['salary_to'],
+                 self._average_salary(vacancy), vacancy['employer'], vacancy['city'], vacancy['requirements'])
+                for vacancy in self.parse_data)
+        before = connection.total_changes
+        connection.executemany(
+            "INSERT OR IGNORE INTO vacancies (title, vacancy_url, salary_from, salary_to, salary_comparison, "
+            "employer, city, requirements) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return connection.total_changes - before
+
+    def save_to_file(self):
+        """
+        Replaces the vacancies in the database with parse_data in a single transaction.
+        """
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM vacancies")
+            self._insert(connection)
+
+    def merge_to_file(self) -> int:
+        """
+        Adds the vacancies of parse_data that are not in the database yet (by vacancy URL).
+
+        Returns:
+            Number of added vacancies.
+        """
+        with closing(self._connect()) as connection, connection:
+            return self._insert(connection)
+
+    def load_from_file(self) -> list[dict]:
+        """
+        Loads all vacancies from the database.
+
+        Returns:
+            Loaded data from the database.
+        """
+        return self._select()
+
+    def get_vacancies_by_salary(self, sal_criteria: int) -> list[dict]:
+        """
+        Retrieves vacancies based on salary criteria using the salary_from index.
+
+        Args:
+            sal_criteria: The salary criteria to filter vacancies.
+        Returns:
+            list: List of matching vacancies or an empty list if no matches found.
+        """
+        return self._select('salary_from >= ?', (sal_criteria,))
+
+    def get_vacancies_by_city(self, city_criteria: str) -> list[dict]:
+        """
+        Retrieves vacancies based on city criteria.
+        The criteria is checked against the distinct cities, which are walked through the city index
+        one index seek per city, then the vacancies of the matching cities are selected through the same index.
+        Cities are compared ignoring case, hyphens and the difference between 'е' and 'ё'.
+
+        Args:
+            city_criteria: The city criteria to filter vacancies.
+        Returns:
+            list: List of matching vacancies or an empty list if no matches found.
+        """
+        matches = city_matcher(city_criteria)
+        matching_cities = []
+        with closing(self._connect()) as connection:
+            city = connection.execute("SELECT MIN(city) AS city FROM vacancies").fetchone()['city']
+            while city is not None:
+                if matches(city):
+                    matching_cities.append(city)
+                city = connection.execute("SELECT MIN(city) AS city FROM vacancies WHERE city > ?",
+                                          (city,)).fetchone()['city']
+        if not matching_cities:
+            return []
+        return self._select(f"city IN ({', '.join('?' * len(matching_cities))})", tuple(matching_cities))
+
+    def delete_vacancy(self, remove_criteria: str):
+        """
+        Deletes the vacancies with the given title from the database in place.
+
+        Args:
+            remove_criteria: Criteria to identify the vacancy to be deleted.
+        """
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM vacancies WHERE title = ?", (remove_criteria,))
+
+    def top_vacancies(self, top_number: int, key: str = 'average') -> list[dict]:
+        """
+        Retrieves the top N vacancies from the database ranked by salary,
+        the salary indexes let the database read only the top rows.
+
+        Args:
+            top_number: The number of top N vacancies to retrieve.
+            key: Salary to rank by: 'average', 'salary_from' or 'salary_to'.
+        Returns:
+            List of top N vacancies, the highest salary first.
+        """
+        if key not in RANKING_KEYS:
+            raise ValueError(f"Ranking key must be one of {RANKING_KEYS}")
+        column = 'salary_comparison' if key == 'average' else key
+        # NULL salaries are sorted after all values in descending order
+        return self._select(suffix=f'ORDER BY {column} DESC, id LIMIT ?', params=(top_number,))
+
+
+class JsonLinesSaver(GeneralStorage):
+    """
+    Implementation of General Storage class for saving and loading data,
+    as well as performing various operations on job vacancies in JSON Lines format.
+
+    Every vacancy is a separate line, so new vacancies are appended without rewriting the file
+    and vacancies are read lazily one line at a time. Deleted vacancies are recorded as tombstones
+    in a small side file and are dropped from the main file by periodic compaction.
+    """
+
+    # Number of tombstones after which the file is compacted
+    COMPACTION_THRESHOLD = 100
+
+    def __init__(self, parse_data, file_path: str) -> None:
+        """
+        Initializes a JsonLinesSaver instance.
+
+        Args:
+            parse_data: Data to be saved or loaded.
+            file_path: Path to the JSON Lines file.
+        """
+        self.parse_data = parse_data
+        self.path = file_path
+        self.tombstones_path = f'{file_path}.tombstones'
+
+    def _write(self, file, vacancies) -> int:
+        """
+        Writes vacancies to an open binary file, one JSON object per line.
+
+        Returns:
+            Number of written vacancies.
+        """
+        count = 0
+        for vacancy in vacancies:
+            if isinstance(vacancy, Vacancy):
+                vacancy = vacancy.to_dict()
+            file.write(json.dumps(vacancy, ensure_ascii=False).encode('utf-8') + b'\n')
+            count += 1
+        return count
+
+    def save_to_file(self):
+        """
+        Saves the parse_data to a JSON Lines file, replacing its content.
+        """
+        with open(self.path, 'wb') as file:
+            self._write(file, self.parse_data)
+        if os.path.isfile(self.tombstones_path):
+            os.remove(self.tombstones_path)
+
+    def append_to_file(self) -> int:
+        """
+        Appends the parse_data to the end of the JSON Lines file without reading or rewriting it.
+        The vacancies must not be in the file yet.
+
+        Returns:
+            Number of appended vacancies.
+        """
+        with open(self.path, 'ab') as file:
+            return self._write(file, self.parse_data)
+
+    def merge_to_file(self) -> int:
+        """
+        Appends the vacancies of parse_data that are not in the file yet (by vacancy URL).
+
+        Returns:
+            Number of added vacancies.
+        """
+        saved_urls = {vacancy['vacancy_url'] for vacancy in self.iter_vacancies()} if os.path.isfile(self.path) else set()
+        new_vacancies = (vacancy for vacancy in self.parse_data if vacancy['vacancy_url'] not in saved_urls)
+        with open(self.path, 'ab') as file:
+            return self._write(file, new_vacancies)
+
+    def _load_tombstones(self) -> dict:
+        """
+        Loads the tombstones of deleted vacancies.
+
+        Returns:
+            Dictionary of deleted titles and the file size at the moment of deletion:
+            vacancies with that title starting before this offset are deleted.
+        """
+        tombstones = {}
+        if os.path.isfile(self.tombstones_path):
+            with open(self.tombstones_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    tombstone = json.loads(line)
+                    tombstones[tombstone['title']] = max(tombstones.get(tombstone['title'], 0), tombstone['offset'])
+        return tombstones
+
+    def iter_vacancies(self, predicate=None) -> Iterator[dict]:
+        """
+        Reads the vacancies that are not deleted lazily, one line at a time.
+
+        Args:
+            predicate: Function that receives a vacancy and returns whether to yield it, all vacancies if None.
+        Returns:
+            Generator of vacancy dictionaries in the order they were saved.
+        """
+        tombstones = self._load_tombstones()
+        offset = 0
+        with open(self.path, 'rb') as file:
+            for line in file:
+                start = offset
+                offset += len(line)
+                if not line.strip():
+                    continue
+                vacancy = json.loads(line)
+                if start < tombstones.get(vacancy['title'], 0):
+                    continue
+                if predicate is None or predicate(vacancy):
+                    yield vacancy
+
+    def load_from_file(self) -> list[dict]:
+        """
+        Loads data from the JSON Lines file.
+
+        Returns:
+            Loaded data from the file.
+        """
+        return list(self.iter_vacancies())
+
+    def get_vacancies_by_salary(self, sal_criteria: int) -> list[dict]:
+        """
+        Retrieves vacancies based on salary criteria.
+
+        Args:
+            sal_criteria: The salary criteria to filter vacancies.
+        Returns:
+            list: List of matching vacancies or an empty list if no matches found.
+        """
+        return list(self.iter_vacancies(
+            lambda vacancy: vacancy['salary_from'] is not None and vacancy['salary_from'] >= sal_criteria))
+
+    def get_vacancies_by_city(self, city_criteria: str) -> list[dict]:
+        """
+        Retrieves vacancies based on city criteria.
+        Cities are compared ignoring case, hyphens and the difference between 'е' and 'ё'.
+
+        Args:
+            city_criteria: The city criteria to filter vacancies.
+        Returns:
+            list: List of matching vacancies or an empty list if no matches found.
+        """
+        matches = city_matcher(city_criteria)
+        return list(self.iter_vacancies(lambda vacancy: matches(vacancy['city'])))
+
+    def delete_vacancy(self, remove_criteria: str):
+        """
+        Deletes the vacancies with the given title by appending a tombstone,
+        the file is compacted once enough tombstones have accumulated.
+
+        Args:
+            remove_criteria: Criteria to identify the vacancy to be deleted.
+        """
+        tombstone = {'title': remove_criteria, 'offset': os.path.getsize(self.path)}
+        with open(self.tombstones_path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(tombstone, ensure_ascii=False) + '\n')
+
+        with open(self.tombstones_path, 'rb') as file:
+            tombstones_count = sum(1 for _ in file)
+        if tombstones_count >= self.COMPACTION_THRESHOLD:
+            self.compact()
+
+    def compact(self):
+        """
+        Rewrites the file without the deleted vacancies and removes the tombstones.
+        The new file is written next to the old one and atomically replaces it.
+        """
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'wb') as file:
+            self._write(file, self.iter_vacancies())
+        os.replace(tmp_path, self.path)
+        if os.path.isfile(self.tombstones_path):
+            os.remove(self.tombstones_path)
+
+    def top_vacancies(self, top_number: int, key: str = 'average') -> list[dict]:
+        """
+        Retrieves the top N vacancies from the storage ranked by salary,
+        streaming the lines of the file through a bounded heap.
+
+        Args:
+            top_number: The number of top N vacancies to retrieve.
+            key: Salary to rank by: 'average', 'salary_from' or 'salary_to'.
+        Returns:
+            List of top N vacancies, the highest salary first.
+        """
+        return top_by_salary(self.iter_vacancies(), top_number, key)
+
+
+class BinarySaver(GeneralStorage):
+    """
+    Implementation of General Storage class for saving and loading data,
+    as well as performing various operations on job vacancies in a compact binary format.
+
+    The file consists of a header, three fixed-width float64 columns (salary_from, salary_to, salary_comparison,
+    NaN for missing values), a table of string offsets and a heap of UTF-8 strings
+    (title, vacancy_url, employer, city and requirements of every vacancy).
+    The file is read through mmap: salary filters read only the numeric columns
+    and decode the strings of the matching vacancies only.
+    """
+
+    _MAGIC = b'VACB'
+    _VERSION = 1
+    # Magic, version, number of vacancies
+    _HEADER = struct.Struct('<4sHxxQ')
+    _SALARY_COLUMNS = ('salary_from', 'salary_to', 'salary_comparison')
+    _STRING_FIELDS = ('title', 'vacancy_url', 'employer', 'city', 'requirements')
+
+    def __init__(self, parse_data, file_path: str) -> None:
+        """
+        Initializes a BinarySaver instance.
+
+        Args:
+            parse_data: Data to be saved or loaded.
+            file_path: Path to the binary file.
+        """
+        self.parse_data = parse_data
+        self.path = file_path
+
+    def _write(self, path: str, vacancies) -> None:
+        """
+        Writes vacancies to a binary file.
+
+        Args:
+            path: Path to the file.
+            vacancies: Iterable of Vacancy objects or vacancy dictionaries.
+        """
+        columns = {name: array('d') for name in self._SALARY_COLUMNS}
+        offsets = array('Q', [0])
+        heap = bytearray()
+
+        for vacancy in vacancies:
+            salary_from = NAN if vacancy['salary_from'] is None else float(vacancy['salary_from'])
+            salary_to = NAN if vacancy['salary_to'] is None else float(vacancy['salary_to'])
+            columns['salary_from'].append(salary_from)
+            columns['salary_to'].append(salary_to)
+            columns['salary_comparison'].append((salary_from + salary_to) / 2)
+            for field in self._STRING_FIELDS:
+                heap += vacancy[field].encode('utf-8')
+                offsets.append(len(heap))
+
+        if sys.byteorder == 'big':
+            for column in (*columns.values(), offsets):
+                column.byteswap()
+
+        with open(path, 'wb') as file:
+            file.write(self._HEADER.pack(self._MAGIC, self._VERSION, len(columns['salary_from'])))
+            for name in self._SALARY_COLUMNS:
+                columns[name].tofile(file)
+            offsets.tofile(file)
+            file.write(heap)
+
+    def save_to_file(self):
+        """
+        Saves the parse_data to a binary file.
+        """
+        self._write(self.path, self.parse_data)
+
+    def merge_to_file(self) -> int:
+        """
+        Adds the vacancies of parse_data that are not in the binary file yet (by vacancy URL) and rewrites the file.
+
+        Returns:
+            Number of added vacancies.
+        """
+        saved_data = self.load_from_file() if os.path.isfile(self.path) else []
+        saved_urls = {vacancy['vacancy_url'] for vacancy in saved_data}
+        new_vacancies = [vacancy for vacancy in self.parse_data if vacancy['vacancy_url'] not in saved_urls]
+
+        tmp_path = f'{self.path}.tmp'
+        self._write(tmp_path, saved_data + new_vacancies)
+        os.replace(tmp_path, self.path)
+        return len(new_vacancies)
+
+    @contextmanager
+    def _open(self):
+        """
+        Maps the file into memory.
+
+        Returns:
+            Context manager yielding the mapped file and the number of vacancies in it.
+        """
+        with open(self.path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            magic, version, count = self._HEADER.unpack_from(mapped, 0)
+            if magic != self._MAGIC or version != self._VERSION:
+                raise ValueError(f'{self.path} is not a vacancy file of version {self._VERSION}')
+            yield mapped, count
+
+    def _salary_column(self, mapped, count: int, name: str):
+        """
+        Reads one salary column, touching only its pages of the file.
+
+        Returns:
+            The column as a NumPy array if NumPy is installed, otherwise as an array of floats.
+        """
+        start = self._HEADER.size + self._SALARY_COLUMNS.index(name) * count * 8
+        if np is not None:
+            return np.frombuffer(mapped[start:start + count * 8], dtype='<f8')
+        column = array('d', mapped[start:start + count * 8])
+        if sys.byteorder == 'big':
+            column.byteswap()
+        return column
+
+    def _read_row(self, mapped, count: int, index: int) -> dict:
+        """
+        Decodes one vacancy.
+
+        Returns:
+            Dictionary of the vacancy.
+        """
+        fields_count = len(self._STRING_FIELDS)
+        offsets_start = self._HEADER.size + len(self._SALARY_COLUMNS) * count * 8
+        heap_start = offsets_start + (count * fields_count + 1) * 8
+        bounds = struct.unpack_from(f'<{fields_count + 1}Q', mapped, offsets_start + index * fields_count * 8)
+
+        vacancy = {field: mapped[heap_start + bounds[i]:heap_start + bounds[i + 1]].decode('utf-8')
+                   for i, field in enumerate(self._STRING_FIELDS)}
+        for name in ('salary_from', 'salary_to'):
+            value = struct.unpack_from('<d', mapped, self._HEADER.size + self._SALARY_COLUMNS.index(name) * count * 8
+                                       + index * 8)[0]
+            vacancy[name] = None if math.isnan(value) else (int(value) if value.is_integer() else value)
+        return {field: vacancy[field] for field in Vacancy.FIELDS}
+
+    def _read_rows(self, indices) -> list[dict]:
+        """
+        Decodes the vacancies with the given indices.
+
+        Returns:
+            List of vacancy dictionaries.
+        """
+        with self._open() as (mapped, count):
+            return [self._read_row(mapped, count, int(index)) for index in indices]
+
+    def load_from_file(self) -> list[dict]:
+        """
+        Loads data from the binary file.
+
+        Returns:
+            Loaded data from the file.
+        """
+        with self._open() as (mapped, count):
+            return [self._read_row(mapped, count, index) for index in range(count)]
+
+    def salary_indices(self, min_salary: float = None, max_salary: float = None, key: str = 'salary_from'):
+        """
+        Finds the vacancies whose salary is within the given bounds using only the salary column.
+
+        Args:
+            min_salary: Lower bound of the salary, inclusive, no bound if None.
+            max_salary: Upper bound of the salary, inclusive, no bound if None.
+            key: Salary column to compare: salary_from, salary_to or salary_comparison.
+        Returns:
+            Indices of the matching vacancies in file order.
+        """
+        low = -math.inf if min_salary is None else min_salary
+        high = math.inf if max_salary is None else max_salary
+
+        with self._open() as (mapped, count):
+            column = self._salary_column(mapped, count, key)
+        if np is not None:
+            return np.flatnonzero((column >= low) & (column <= high))
+        return [index for index, value in enumerate(column) if low <= value <= high]
+
+    def get_vacancies_by_salary(self, sal_criteria: int) -> list[dict]:
+        """
+        Retrieves vacancies based on salary criteria.
+
+        Args:
+            sal_criteria: The salary criteria to filter vacancies.
+        Returns:
+            list: List of matching vacancies or an empty list if no matches found.
+        """
+        return self._read_rows(self.salary_indices(min_salary=sal_criteria))
+
+    def get_vacancies_by_city(self, city_criteria: str) -> list[dict]:
+        """
+        Retrieves vacancies based on city criteria.
+        Cities are compared ignoring case, hyphens and the difference between 'е' and 'ё'. Every distinct city
+        is decoded and compared once, only the matching vacancies are decoded.
+
+        Args:
+            city_criteria: The city criteria to filter vacancies.
+        Returns:
+            list: List of matching vacancies or an empty list if no matches found.
+        """
+        matches = city_matcher(city_criteria)
+        matched = {}
+        city_field = self._STRING_FIELDS.index('city')
+        fields_count = len(self._STRING_FIELDS)
+
+        with self._open() as (mapped, count):
+            offsets_start = self._HEADER.size + len(self._SALARY_COLUMNS) * count * 8
+            heap_start = offsets_start + (count * fields_count + 1) * 8
+            offsets = array('Q', mapped[offsets_start:heap_start])
+            if sys.byteorder == 'big':
+                offsets.byteswap()
+
+            matching = []
+            for index in range(count):
+                position = index * fields_count + city_field
+                city = mapped[heap_start + offsets[position]:heap_start + offsets[position + 1]]
+                result = matched.get(city)
+                if result is None:
+                    result = matched[city] = matches(city.decode('utf-8'))
+                if result:
+                    matching.append(self._read_row(mapped, count, index))
+            return matching
+
+    def delete_vacancy(self, remove_criteria: str):
+        """
+        Deletes a vacancy from the storage based on criteria and save the updated data to the file.
+        The file is rewritten next to the old one and atomically replaces it.
+
+        Args:
+            remove_criteria: Criteria to identify the vacancy to be deleted.
+        """
+        remaining_vacancies = [vacancy for vacancy in self.load_from_file() if vacancy['title'] != remove_criteria]
+        tmp_path = f'{self.path}.tmp'
+        self._write(tmp_path, remaining_vacancies)
+        os.replace(tmp_path, self.path)
+
+    def top_vacancies(self, top_number: int, key: str = 'average') -> list[dict]:
+        """
+        Retrieves the top N vacancies from the storage ranked by salary.
+        Only the salary column is scanned, the strings of the top N vacancies are decoded.
+
+        Args:
+            top_number: The number of top N vacancies to retrieve.
+            key: Salary to rank by: 'average', 'salary_from' or 'salary_to'.
+        Returns:
+            List of top N vacancies, the highest salary first.
+        """
+        if key not in RANKING_KEYS:
+            raise ValueError(f"Ranking key must be one of {RANKING_KEYS}")
+        # A missing average ranks as 0 like Vacancy.salary_comparison, a missing bound ranks last
+        missing = 0 if key == 'average' else -math.inf
+
+        with self._open() as (mapped, count):
+            column = self._salary_column(mapped, count, 'salary_comparison' if key == 'average' else key)
+            top_number = min(top_number, count)
+            if top_number <= 0:
+                return []
+
+            if np is not None:
+                ranked = np.where(np.isnan(column), missing, column)
+                # All vacancies tied with the N-th highest salary are candidates, so ties keep the file order
+                threshold = np.partition(ranked, count - top_number)[count - top_number]
+                candidates = np.flatnonzero(ranked >= threshold)
+                indices = candidates[np.lexsort((candidates, -ranked[candidates]))][:top_number]
+            else:
+                rank = lambda index: missing if math.isnan(column[index]) else column[index]
+                indices = heapq.nlargest(top_number, range(count), key=rank)
+
+            return [self._read_row(mapped, count, int(index)) for index in indices]
+
+
+class ParquetSaver(GeneralStorage):
+    """
+    Implementation of General Storage class for saving and loading data,
+    as well as performing various operations on job vacancies in the columnar Parquet format.
+
+    City and employer are dictionary-encoded, requirements are compressed with zstd, and every row group
+    keeps min/max statistics of the salary columns. Queries read only the columns they need:
+    salary filters skip the row groups whose statistics are out of range, the city filter reads
+    the city column and decodes the other columns of the row groups with matches only.
+    Requires pyarrow.
+    """
+
+    ROW_GROUP_SIZE = 64_000
+    _SALARY_COLUMNS = ('salary_from', 'salary_to', 'salary_comparison')
+    _DICTIONARY_FIELDS = ('employer', 'city')
+    _COMPRESSION = {'title': 'snappy', 'vacancy_url': 'snappy', 'salary_from': 'snappy', 'salary_to': 'snappy',
+                    'salary_comparison': 'snappy', 'employer': 'snappy', 'city': 'snappy', 'requirements': 'zstd'}
+
+    def __init__(self, parse_data, file_path: str) -> None:
+        """
+        Initializes a ParquetSaver instance.
+
+        Args:
+            parse_data: Data to be saved or loaded.
+            file_path: Path to the Parquet file.
+        Raises:
+            ImportError: If pyarrow is not installed.
+        """
+        if pq is None:
+            raise ImportError('ParquetSaver requires pyarrow, install the extra with: poetry install -E parquet')
+        self.parse_data = parse_data
+        self.path = file_path
+
+    @staticmethod
+    def available() -> bool:
+        """
+        Checks whether pyarrow is installed.
+
+        Returns:
+            True if the Parquet storage can be used.
+        """
+        return pq is not None
+
+    @classmethod
+    def _schema(cls):
+        """Returns the Arrow schema of the file"""
+        types = {field: pa.string() for field in Vacancy.FIELDS}
+        types.update({name: pa.float64() for name in cls._SALARY_COLUMNS})
+        types.update({field: pa.dictionary(pa.int32(), pa.string()) for field in cls._DICTIONARY_FIELDS})
+        return pa.schema([(name, types[name]) for name in (*Vacancy.FIELDS, 'salary_comparison')])
+
+    def _table(self, vacancies):
+        """
+        Converts vacancies to an Arrow table.
+
+        Args:
+            vacancies: Iterable of Vacancy objects or vacancy dictionaries.
+        Returns:
+            Table with the schema of the file.
+        """
+        columns = {field: [] for field in Vacancy.FIELDS}
+        for vacancy in vacancies:
+            for field in Vacancy.FIELDS:
+                columns[field].append(vacancy[field])
+        # The average is known only for vacancies with both salary bounds, like in the salary index
+        columns['salary_comparison'] = [None if salary_from is None or salary_to is None else
+                                        (float(salary_from) + float(salary_to)) / 2
+                                        for salary_from, salary_to in zip(columns['salary_from'], columns['salary_to'])]
+
+        schema = self._schema()
+        arrays = []
+        for field in schema:
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(columns[field.name], pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(columns[field.name], field.type))
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    def _write(self, table) -> None:
+        """
+        Writes a table to a file next to the Parquet file, which then atomically replaces it.
+
+        Args:
+            table: Table with the schema of the file.
+        """
+        tmp_path = f'{self.path}.tmp'
+        pq.write_table(table, tmp_path, row_group_size=self.ROW_GROUP_SIZE, compression=self._COMPRESSION,
+                       use_dictionary=list(self._DICTIONARY_FIELDS), write_statistics=True)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _rows(table) -> list[dict]:
+        """
+        Converts an Arrow table to vacancy dictionaries, whole salaries become int.
+
+        Returns:
+            List of vacancy dictionaries.
+        """
+        rows = table.select(list(Vacancy.FIELDS)).to_pylist()
+        for row in rows:
+            for name in ('salary_from', 'salary_to'):
+                value = row[name]
+                if value is not None and value.is_integer():
+                    row[name] = int(value)
+        return rows
+
+    def save_to_file(self):
+        """
+        Saves the parse_data to a Parquet file.
+        """
+        self._write(self._table(self.parse_data))
+
+    def merge_to_file(self) -> int:
+        """
+        Adds the vacancies of parse_data that are not in the Parquet file yet (by vacancy URL) and rewrites the file.
+        Only the URL column is read to find the new vacancies.
+
+        Returns:
+            Number of added vacancies.
+        """
+        if not os.path.isfile(self.path):
+            self.save_to_file()
+            return len(self.parse_data)
+
+        saved_urls = set(pq.read_table(self.path, columns=['vacancy_url']).column('vacancy_url').to_pylist())
+        new_vacancies = [vacancy for vacancy in self.parse_data if vacancy['vacancy_url'] not in saved_urls]
+        if new_vacancies:
+            saved_table = pq.read_table(self.path).cast(self._schema())
+            self._write(pa.concat_tables([saved_table, self._table(new_vacancies)]))
+        return len(new_vacancies)
+
+    def load_from_file(self) -> list[dict]:
+        """
+        Loads data from the Parquet file.
+
+        Returns:
+            Loaded data from the file.
+        """
+        return self._rows(pq.read_table(self.path, columns=list(Vacancy.FIELDS)))
+
+    def get_vacancies_by_salary_range(self, min_salary: float = None, max_salary: float = None,
+                                      key: str = 'salary_from') -> list[dict]:
+        """
+        Retrieves vacancies whose salary is within the given bounds.
+        The bounds are pushed down to the reader, which skips the row groups out of range by their statistics.
+
+        Args:
+            min_salary: Lower bound of the salary, inclusive, no bound if None.
+            max_salary: Upper bound of the salary, inclusive, no bound if None.
+            key: Salary to compare: 'salary_from', 'salary_to' or 'average'.
+        Returns:
+            list: List of matching vacancies in file order or an empty list if no matches found.
+        """
+        if key not in RANKING_KEYS:
+            raise ValueError(f"Salary key must be one of {RANKING_KEYS}")
+        column = pc.field('salary_comparison' if key == 'average' else key)
+        condition = column.is_valid()
+        if min_salary is not None:
+            condition &= column >= min_salary
+        if max_salary is not None:
+            condition &= column <= max_salary
+        return self._rows(pq.read_table(self.path, columns=list(Vacancy.FIELDS), filters=condition))
+
+    def get_vacancies_by_salary(self, sal_criteria: int) -> list[dict]:
+        """
+        Retrieves vacancies based on salary criteria.
+
+        Args:
+            sal_criteria: The salary criteria to filter vacancies.
+        Returns:
+            list: List of matching vacancies or an empty list if no matches found.
+        """
+        return self.get_vacancies_by_salary_range(min_salary=sal_criteria)
+
+    @staticmethod
+    def _city_mask(cities, matches):
+        """
+        Matches the city column against the criteria.
+        For a dictionary-encoded column only the distinct cities are compared.
+
+        Args:
+            cities: The city column.
+            matches: Function of a city name returning whether it matches the criteria.
+        Returns:
+            Boolean array, True for the vacancies whose city contains the criteria.
+        """
+        masks = []
+        for chunk in cities.chunks:
+            if pa.types.is_dictionary(chunk.type):
+                dictionary = [city is not None and matches(city) for city in chunk.dictionary.to_pylist()]
+                masks.append(pa.array(dictionary, pa.bool_()).take(chunk.indices))
+            else:
+                masks.append(pa.array([city is not None and matches(city) for city in chunk.to_pylist()], pa.bool_()))
+        return pc.fill_null(pa.chunked_array(masks, pa.bool_()), False)
+
+    def get_vacancies_by_city(self, city_criteria: str) -> list[dict]:
+        """
+        Retrieves vacancies based on city criteria.
+        Only the city column is read for every row group, the other columns are read for the row groups with matches.
+        Cities are compared ignoring case, hyphens and the difference between 'е' and 'ё'.
+
+        Args:
+            city_criteria: The city criteria to filter vacancies.
+        Returns:
+            list: List of matching vacancies or an empty list if no matches found.
+        """
+        matches = city_matcher(city_criteria)
+        matching = []
+        with pq.ParquetFile(self.path) as parquet_file:
+            for group in range(parquet_file.num_row_groups):
+                mask = self._city_mask(parquet_file.read_row_group(group, columns=['city']).column('city'), matches)
+                if pc.any(mask).as_py():
+                    table = parquet_file.read_row_group(group, columns=list(Vacancy.FIELDS))
+                    matching += self._rows(table.filter(mask))
+        return matching
+
+    def delete_vacancy(self, remove_criteria: str):
+        """
+        Deletes a vacancy from the storage based on criteria and save the updated data to the file.
+        The file is rewritten next to the old one and atomically replaces it.
+
+        Args:
+            remove_criteria: Criteria to identify the vacancy to be deleted.
+        """
+        table = pq.read_table(self.path).cast(self._schema())
+        self._write(table.filter(pc.not_equal(table.column('title'), remove_criteria)))
+
+    def top_vacancies(self, top_number: int, key: str = 'average') -> list[dict]:
+        """
+        Retrieves the top N vacancies from the storage ranked by salary.
+        Only the salary column is read for ranking, the other columns are read
+        for the row groups holding the top N vacancies.
+
+        Args:
+            top_number: The number of top N vacancies to retrieve.
+            key: Salary to rank by: 'average', 'salary_from' or 'salary_to'.
+        Returns:
+            List of top N vacancies, the highest salary first.
+        """
+        if key not in RANKING_KEYS:
+            raise ValueError(f"Ranking key must be one of {RANKING_KEYS}")
+        if top_number <= 0:
+            return []
+        column = 'salary_comparison' if key == 'average' else key
+        # A missing average ranks as 0 like Vacancy.salary_comparison, a missing bound ranks last
+        missing = 0.0 if key == 'average' else -math.inf
+
+        ranked = pc.fill_null(pq.read_table(self.path, columns=[column]).column(column), missing)
+        # The sort is stable, so vacancies with equal salaries keep the file order
+        indices = pc.array_sort_indices(ranked, order='descending')[:top_number].to_pylist()
 
-        return new_data
+        rows = {}
+        with pq.ParquetFile(self.path) as parquet_file:
+            group_start = 0
+            for group in range(parquet_file.num_row_groups):
+                group_end = group_start + parquet_file.metadata.row_group(group).num_rows
+                wanted = [index for index in indices if group_start <= index < group_end]
+                if wanted:
+                    table = parquet_file.read_row_group(group, columns=list(Vacancy.FIELDS))
+                    taken = table.take([index - group_start for index in wanted])
+                    rows.update(zip(wanted, self._rows(taken)))
+                group_start = group_end
+        return [rows[index] for index in indices]
@@ -0,0 +1,211 @@
+"""Persistent on-disk cache of API responses with TTL, revalidation and LRU eviction"""
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit, urlencode
+
+# Default location and size limit of the cache
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'saved_vacancies', 'http_cache')
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+class ResponseCache:
+    """
+    Stores decoded JSON responses of the platform APIs on disk.
+
+    Each entry is a separate file named after the hash of the normalized request URL and parameters.
+    Entries older than the TTL of the platform are revalidated with ETag/If-Modified-Since,
+    the least recently used entries are evicted once the total size exceeds max_bytes.
+
+    Attributes:
+        hits (int): Number of responses served from the cache without any request.
+        revalidations (int): Number of cached responses confirmed by the server as not modified.
+        misses (int): Number of responses that had to be downloaded.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """
+        Initializes a ResponseCache instance and indexes the entries already on disk.
+
+        Args:
+            cache_dir: Directory where the cache entries are stored.
+            max_bytes: Maximum total size of the cache entries in bytes.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> [size in bytes, last access time]
+        self._entries = {}
+        self._total_bytes = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        for file in os.scandir(cache_dir):
+            if file.name.endswith('.json'):
+                stat = file.stat()
+                self._entries[file.name[:-5]] = [stat.st_size, stat.st_mtime]
+                self._total_bytes += stat.st_size
+
+    @staticmethod
+    def make_key(url: str, params: dict) -> str:
+        """
+        Builds the cache key from the normalized request URL and parameters.
+        Parameters with None values are dropped, since requests does not send them.
+
+        Args:
+            url: Request URL.
+            params: Request query parameters.
+        Returns:
+            Hex digest identifying the request.
+        """
+        parts = urlsplit(url)
+        normalized_url = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', '', ''))
+        query = urlencode(sorted((key, str(value)) for key, value in (params or {}).items() if value is not None))
+        return hashlib.sha256(f'{normalized_url}?{query}'.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        """Returns the path of the entry file."""
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def lookup(self, url: str, params: dict, ttl: float):
+        """
+        Looks up the cached response of a request.
+
+        Args:
+            url: Request URL.
+            params: Request query parameters.
+            ttl: Time in seconds during which the entry is served without revalidation.
+        Returns:
+            Tuple of the cache entry (or None if there is no entry) and a flag telling whether it is still fresh.
+        """
+        key = self.make_key(url, params)
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None, False
+
+        fresh = time.time() - entry['stored_at'] < ttl
+        with self._lock:
+            if fresh:
+                self.hits += 1
+            self._touch(key)
+        return entry, fresh
+
+    def store(self, url: str, params: dict, data: dict, etag: str = None, last_modified: str = None) -> None:
+        """
+        Saves a downloaded response to the cache and evicts old entries if the cache is over its size limit.
+
+        Args:
+            url: Request URL.
+            params: Request query parameters.
+            data: Decoded JSON response.
+            etag: Value of the ETag response header.
+            last_modified: Value of the Last-Modified response header.
+        """
+        entry = {'stored_at': time.time(), 'etag': etag, 'last_modified': last_modified, 'data': data}
+        with self._lock:
+            self.misses += 1
+            self._write(self.make_key(url, params), entry)
+
+    def revalidate(self, url: str, params: dict, entry: dict) -> None:
+        """
+        Marks a cached entry as fresh again after the server answered 304 Not Modified.
+
+        Args:
+            url: Request URL.
+            params: Request query parameters.
+            entry: Cache entry returned by lookup.
+        """
+        entry = dict(entry, stored_at=time.time())
+        with self._lock:
+            self.revalidations += 1
+            self._write(self.make_key(url, params), entry)
+
+    def _write(self, key: str, entry: dict) -> None:
+        """Atomically writes the entry file and updates the LRU index, the lock must be held by the caller."""
+        payload = json.dumps(entry, ensure_ascii=False).encode('utf-8')
+        tmp_path = f'{self._path(key)}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(payload)
+        os.replace(tmp_path, self._path(key))
+
+        old_size = self._entries.get(key, [0])[0]
+        self._entries[key] = [len(payload), time.time()]
+        self._total_bytes += len(payload) - old_size
+        self._evict()
+
+    def _touch(self, key: str) -> None:
+        """Moves the entry to the most recently used end, the lock must be held by the caller."""
+        if key in self._entries:
+            now = time.time()
+            self._entries[key][1] = now
+            try:
+                os.utime(self._path(key), (now, now))
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        """Removes the least recently used entries until the cache fits in max_bytes, the lock must be held."""
+        if self._total_bytes <= self.max_bytes:
+            return
+        for key, (size, _) in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            del self._entries[key]
+            self._total_bytes -= size
+
+    def clear(self) -> None:
+        """Removes all entries from the cache."""
+        with self._lock:
+            for key in list(self._entries):
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the cache counters.
+
+        Returns:
+            Dictionary with hits, revalidations, misses, hit rate, number of entries and their total size.
+        """
+        with self._lock:
+            requests_total = self.hits + self.revalidations + self.misses
+            return {
+                'hits': self.hits,
+                'revalidations': self.revalidations,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.revalidations) / requests_total if requests_total else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+            }
+
+
+def get_default_cache() -> ResponseCache:
+    """
+    Returns the cache shared by all API instances, creating it on the first call.
+
+    Returns:
+        Shared response cache.
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = ResponseCache()
+    return _default_cache
@@ -0,0 +1,47 @@
+"""Shared HTTP session with connection pooling for the API classes"""
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Number of hosts with kept pools and number of kept-alive connections per host
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 16
+
+_default_session = None
+_default_session_lock = threading.Lock()
+
+
+def create_session(pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                   pool_maxsize: int = DEFAULT_POOL_MAXSIZE) -> requests.Session:
+    """
+    Creates an HTTP session that keeps connections alive and reuses them between requests.
+
+    :param pool_connections: Number of hosts for which connection pools are kept.
+    :param pool_maxsize: Maximum number of connections kept alive per host,
+        should be not less than the number of concurrent requests to one platform.
+    :return: Configured requests session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive',
+    })
+    return session
+
+
+def get_default_session() -> requests.Session:
+    """
+    Returns the session shared by all API instances, creating it on the first call.
+
+    :return: Shared requests session.
+    """
+    global _default_session
+    if _default_session is None:
+        with _default_session_lock:
+            if _default_session is None:
+                _default_session = create_session()
+    return _default_session
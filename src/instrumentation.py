@@ -0,0 +1,432 @@
+"""
+Timing instrumentation of the API, parse and storage layers.
+
+Instrumentation is off by default and costs nothing then. enable() wraps the methods of the API clients
+and the savers, every call produces an event passed to the hooks, the built-in Metrics hook collects
+latency histograms, item counts, HTTP bytes, file sizes and errors. Metrics are exported to a JSON file
+or as Prometheus text, also served over HTTP. profiling() captures a cProfile of a single run.
+"""
+import cProfile
+import functools
+import inspect
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src import http_cache
+from src.api_classes import HeadHunterAPI, PlatformAPI, SuperJobAPI
+from src.file_saver import (BinarySaver, CSVSaver, JsonLinesSaver, JsonSaver, ParquetSaver, SQLiteSaver,
+                            StreamingCSVSaver)
+
+# Upper bounds of the latency histogram buckets in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+API_METHODS = ('get_vacancies', 'parse', 'iter_parse')
+STORAGE_METHODS = ('save_to_file', 'merge_to_file', 'append_to_file', 'load_from_file',
+                   'get_vacancies_by_salary', 'get_vacancies_by_salary_range', 'get_vacancies_by_city',
+                   'search_vacancies', 'top_vacancies', 'delete_vacancy')
+INSTRUMENTED = {
+    PlatformAPI: ('_send',),
+    HeadHunterAPI: API_METHODS,
+    SuperJobAPI: API_METHODS,
+    JsonSaver: STORAGE_METHODS,
+    CSVSaver: STORAGE_METHODS,
+    StreamingCSVSaver: STORAGE_METHODS,
+    SQLiteSaver: STORAGE_METHODS,
+    JsonLinesSaver: STORAGE_METHODS,
+    BinarySaver: STORAGE_METHODS,
+    ParquetSaver: STORAGE_METHODS,
+}
+
+
+class Histogram:
+    """
+    Cumulative histogram of observed values with fixed bucket bounds, like the Prometheus histogram.
+    """
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS) -> None:
+        """
+        Initializes an empty histogram.
+
+        Args:
+            buckets: Sorted upper bounds of the buckets, +Inf is added implicitly.
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Adds a value to the histogram"""
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            index = len(self.buckets)
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> list[tuple]:
+        """Returns (upper bound, number of values not above it) pairs, the last bound is +Inf"""
+        pairs, total = [], 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def quantile(self, q: float) -> float:
+        """Estimates a quantile as the upper bound of the bucket it falls into"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+        return float('inf')
+
+
+def _finite(value: float):
+    """Returns the value or None if it is infinite, JSON has no infinity"""
+    return None if value == float('inf') else value
+
+
+class Metrics:
+    """
+    Hook collecting the events of instrumented calls into histograms and counters.
+
+    Attributes:
+        latency (dict): Histogram of call durations by (component, method).
+        calls (dict): Number of calls by (component, method).
+        errors (dict): Number of calls that raised by (component, method).
+        items (dict): Number of returned items by (component, method).
+        bytes (dict): Number of bytes received over HTTP by (component, method).
+        file_size_bytes (dict): Size of the file after the last read or write by (component, method).
+        http_requests (dict): Number of HTTP responses by (component, status code).
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes empty metrics.
+        """
+        self._lock = threading.Lock()
+        self.latency = {}
+        self.calls = {}
+        self.errors = {}
+        self.items = {}
+        self.bytes = {}
+        self.file_size_bytes = {}
+        self.http_requests = {}
+
+    def __call__(self, event: dict) -> None:
+        """
+        Records an event of an instrumented call.
+
+        Args:
+            event: The event made by the instrumented method.
+        """
+        key = (event['component'], event['method'])
+        with self._lock:
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = Histogram()
+            histogram.observe(event['seconds'])
+            self.calls[key] = self.calls.get(key, 0) + 1
+            if event['error'] is not None:
+                self.errors[key] = self.errors.get(key, 0) + 1
+            if event['items'] is not None:
+                self.items[key] = self.items.get(key, 0) + event['items']
+            if event['bytes'] is not None:
+                self.bytes[key] = self.bytes.get(key, 0) + event['bytes']
+            if event.get('file_size_bytes') is not None:
+                self.file_size_bytes[key] = event['file_size_bytes']
+            if event.get('status') is not None:
+                status_key = (event['component'], event['status'])
+                self.http_requests[status_key] = self.http_requests.get(status_key, 0) + 1
+
+    @staticmethod
+    def cache_stats() -> dict:
+        """Returns the counters of the shared HTTP response cache, empty if it has not been used"""
+        cache = http_cache._default_cache
+        return cache.stats() if cache is not None else {}
+
+    def snapshot(self) -> dict:
+        """
+        Returns the metrics as a JSON-serializable dictionary.
+        """
+        with self._lock:
+            calls = []
+            for key, histogram in sorted(self.latency.items()):
+                component, method = key
+                calls.append({
+                    'component': component,
+                    'method': method,
+                    'calls': self.calls[key],
+                    'errors': self.errors.get(key, 0),
+                    'items': self.items.get(key),
+                    'bytes': self.bytes.get(key),
+                    'file_size_bytes': self.file_size_bytes.get(key),
+                    'seconds_total': histogram.sum,
+                    'seconds_p50': histogram.quantile(0.5),
+                    'seconds_p95': _finite(histogram.quantile(0.95)),
+                    'seconds_p99': _finite(histogram.quantile(0.99)),
+                    'buckets': {str(bound): count for bound, count in histogram.cumulative()},
+                })
+            http_requests = [{'component': component, 'status': status, 'count': count}
+                             for (component, status), count in sorted(self.http_requests.items())]
+        return {'calls': calls, 'http_requests': http_requests, 'http_cache': self.cache_stats()}
+
+    def write(self, file_path: str) -> None:
+        """
+        Writes the metrics to a JSON file.
+
+        Args:
+            file_path: Path to the metrics file.
+        """
+        with open(file_path, 'w', encoding='utf-8') as file:
+            json.dump(self.snapshot(), file, ensure_ascii=False, indent=2)
+
+    def prometheus(self) -> str:
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        lines = [
+            '# HELP job_parser_call_seconds Duration of instrumented calls.',
+            '# TYPE job_parser_call_seconds histogram',
+        ]
+        with self._lock:
+            for (component, method), histogram in sorted(self.latency.items()):
+                labels = f'component="{component}",method="{method}"'
+                for bound, total in histogram.cumulative():
+                    bound = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'job_parser_call_seconds_bucket{{{labels},le="{bound}"}} {total}')
+                lines.append(f'job_parser_call_seconds_sum{{{labels}}} {histogram.sum}')
+                lines.append(f'job_parser_call_seconds_count{{{labels}}} {histogram.count}')
+
+            for name, help_text, values in (
+                    ('job_parser_call_errors_total', 'Instrumented calls that raised an exception.', self.errors),
+                    ('job_parser_items_total', 'Items returned by instrumented calls.', self.items),
+                    ('job_parser_bytes_total', 'Bytes received over HTTP.', self.bytes)):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                for (component, method), value in sorted(values.items()):
+                    lines.append(f'{name}{{component="{component}",method="{method}"}} {value}')
+
+            name = 'job_parser_file_size_bytes'
+            lines += [f'# HELP {name} Size of the storage file after the last instrumented read or write.',
+                      f'# TYPE {name} gauge']
+            for (component, method), value in sorted(self.file_size_bytes.items()):
+                lines.append(f'{name}{{component="{component}",method="{method}"}} {value}')
+
+            lines += ['# HELP job_parser_http_responses_total HTTP responses by status code, 0 for failed requests.',
+                      '# TYPE job_parser_http_responses_total counter']
+            for (component, status), count in sorted(self.http_requests.items()):
+                lines.append(f'job_parser_http_responses_total{{component="{component}",status="{status}"}} {count}')
+
+        stats = self.cache_stats()
+        if stats:
+            lines += ['# HELP job_parser_http_cache_requests_total Lookups of the HTTP response cache by result.',
+                      '# TYPE job_parser_http_cache_requests_total counter']
+            for result in ('hits', 'revalidations', 'misses'):
+                lines.append(f'job_parser_http_cache_requests_total{{result="{result}"}} {stats[result]}')
+            lines += ['# HELP job_parser_http_cache_hit_rate Share of requests served from the HTTP response cache.',
+                      '# TYPE job_parser_http_cache_hit_rate gauge',
+                      f"job_parser_http_cache_hit_rate {stats['hit_rate']}"]
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port: int = 9108, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """
+        Serves the metrics in the Prometheus format at /metrics from a background thread.
+
+        Args:
+            port: Port of the endpoint, 0 for a free port.
+            host: Interface of the endpoint.
+        Returns:
+            The running server, call shutdown() to stop it.
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+metrics = Metrics()
+_hooks = [metrics]
+_originals = {}
+
+
+def add_hook(hook) -> None:
+    """
+    Adds a callback called with the event of every instrumented call.
+    An event is a dictionary with component, method, seconds, items, bytes and error, plus status
+    for HTTP requests and file_size_bytes for file reads and writes.
+
+    Args:
+        hook: Callable taking the event.
+    """
+    _hooks.append(hook)
+
+
+def remove_hook(hook) -> None:
+    """Removes a callback added with add_hook"""
+    _hooks.remove(hook)
+
+
+def _count_items(result):
+    """Returns the number of items in the result of a call, None if it is not a collection"""
+    if isinstance(result, dict):
+        for key in ('items', 'objects'):
+            if isinstance(result.get(key), list):
+                return len(result[key])
+        return None
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    if isinstance(result, int) and not isinstance(result, bool):
+        return result
+    return None
+
+
+def _file_size(storage):
+    """Returns the size of the file of a saver, None if it does not exist"""
+    path = getattr(storage, 'path', None) or getattr(storage, 'filename', None) or getattr(storage, 'db_path', None)
+    try:
+        return os.path.getsize(path) if path else None
+    except OSError:
+        return None
+
+
+def _emit(event: dict) -> None:
+    """Passes an event to the hooks"""
+    for hook in _hooks:
+        hook(event)
+
+
+def _instrumented_generator(generator, event: dict):
+    """
+    Wraps a generator so that only the time spent inside it is measured and the yielded items are counted.
+    The event is emitted when the generator is exhausted or closed.
+    """
+    event['items'] = 0
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(generator)
+            except StopIteration:
+                return
+            finally:
+                event['seconds'] += time.perf_counter() - started
+            event['items'] += 1
+            yield item
+    except Exception as error:
+        event['error'] = error
+        raise
+    finally:
+        generator.close()
+        _emit(event)
+
+
+def _instrumented(method, method_name: str):
+    """Wraps a method so that its calls are timed and reported to the hooks"""
+    io_method = method_name in ('save_to_file', 'merge_to_file', 'append_to_file', 'load_from_file')
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        started = time.perf_counter()
+        event = {'component': type(self).__name__, 'method': method_name,
+                 'seconds': 0.0, 'error': None, 'items': None, 'bytes': None}
+        result = None
+        try:
+            result = method(self, *args, **kwargs)
+            if inspect.isgenerator(result):
+                event['seconds'] = time.perf_counter() - started
+                result = _instrumented_generator(result, event)
+                event = None
+            return result
+        except Exception as error:
+            event['error'] = error
+            raise
+        finally:
+            if event is not None:
+                event['seconds'] = time.perf_counter() - started
+                if method_name == '_send':
+                    event['status'] = result.status_code if result is not None else 0
+                    event['bytes'] = _response_size(result)
+                else:
+                    event['items'] = _count_items(result)
+                    if io_method:
+                        event['file_size_bytes'] = _file_size(self)
+                _emit(event)
+
+    wrapper.__instrumented__ = True
+    return wrapper
+
+
+def _response_size(response) -> int:
+    """Returns the number of bytes received with a response, compressed if the server compressed it"""
+    if response is None:
+        return 0
+    length = response.headers.get('Content-Length')
+    return int(length) if length and length.isdigit() else len(response.content)
+
+
+def enable() -> None:
+    """
+    Starts instrumenting the API clients and the savers.
+    """
+    for cls, method_names in INSTRUMENTED.items():
+        for method_name in method_names:
+            method = cls.__dict__.get(method_name)
+            if method is None or getattr(method, '__instrumented__', False):
+                continue
+            _originals[(cls, method_name)] = method
+            setattr(cls, method_name, _instrumented(method, method_name))
+
+
+def disable() -> None:
+    """
+    Stops instrumenting and restores the original methods.
+    """
+    for (cls, method_name), method in _originals.items():
+        setattr(cls, method_name, method)
+    _originals.clear()
+
+
+@contextmanager
+def profiling(file_path: str = None, top: int = 25):
+    """
+    Captures a cProfile of the code run inside the block and prints the most expensive functions.
+
+    Args:
+        file_path: Path to save the raw profile for snakeviz or pstats, not saved if None.
+        top: Number of functions printed, sorted by cumulative time.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if file_path:
+            profiler.dump_stats(file_path)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(top)
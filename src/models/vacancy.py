@@ -10,8 +10,16 @@ class Vacancy:
         employer (str): The name of the employer.
         city (str): The city where the vacancy is located.
         requirements (str): The requirements for the vacancy.
+        salary_comparison (int, float): The average salary used to compare vacancies, 0 if it is unknown.
     """
 
+    # Keys available through the [] operator and saved to files
+    FIELDS = ('title', 'vacancy_url', 'salary_from', 'salary_to', 'employer', 'city', 'requirements')
+    _FIELDS_SET = frozenset(FIELDS)
+
+    # Attributes are stored in slots instead of a per-instance __dict__ to keep vacancies compact
+    __slots__ = FIELDS + ('salary_comparison',)
+
     def __init__(self, title, vacancy_url, salary_from, salary_to, employer, city, requirements) -> None:
         """
         Initializes a Vacancy object.
@@ -54,6 +62,37 @@ class Vacancy:
         else:
             self.salary_comparison = (salary_from + salary_to) / 2
 
+    @classmethod
+    def from_trusted(cls, title, vacancy_url, salary_from, salary_to, employer, city, requirements) -> 'Vacancy':
+        """
+        Creates a Vacancy object without validating the attributes.
+        Intended for data that is known to have the right types, e.g. vacancies produced by the API parsers.
+
+        Args:
+            title (str): The title of the vacancy.
+            vacancy_url (str): The URL link to the vacancy.
+            salary_from (int, float, None): The minimum salary offered for the vacancy.
+            salary_to (int, float, None): The maximum salary offered for the vacancy.
+            employer (str): The name of the employer.
+            city (str): The city where the vacancy is located.
+            requirements (str): The requirements for the vacancy.
+        Returns:
+            Vacancy: The created vacancy.
+        """
+        vacancy = cls.__new__(cls)
+        vacancy.title = title
+        vacancy.vacancy_url = vacancy_url
+        vacancy.salary_from = salary_from
+        vacancy.salary_to = salary_to
+        vacancy.employer = employer
+        vacancy.city = city
+        vacancy.requirements = requirements
+        if salary_from is None or salary_to is None:
+            vacancy.salary_comparison = 0
+        else:
+            vacancy.salary_comparison = (salary_from + salary_to) / 2
+        return vacancy
+
     def __getitem__(self, key):
         """
         Accesses the attributes of the Vacancy object using the [] operator.
@@ -65,20 +104,8 @@ class Vacancy:
         Raises:
             KeyError: If the specified key is not a valid attribute of Vacancy.
         """
-        if key == 'title':
-            return self.title
-        elif key == 'vacancy_url':
-            return self.vacancy_url
-        elif key == 'salary_from':
-            return self.salary_from
-        elif key == 'salary_to':
-            return self.salary_to
-        elif key == 'employer':
-            return self.employer
-        elif key == 'city':
-            return self.city
-        elif key == 'requirements':
-            return self.requirements
+        if key in self._FIELDS_SET:
+            return getattr(self, key)
         else:
             raise KeyError(f"'{key}' is not a valid key for Vacancy")
 
@@ -152,14 +179,29 @@ class Vacancy:
         Returns:
             dict: A dictionary containing the vacancy attributes.
         """
-        vacancy_data = {
-            'title': self.title,
-            'vacancy_url': self.vacancy_url,
-            'salary_from': self.salary_from,
-            'salary_to': self.salary_to,
-            'employer': self.employer,
-            'city': self.city,
-            'requirements': self.requirements
-        }
+        vacancy_data = {field: getattr(self, field) for field in self.FIELDS}
 
         return vacancy_data
+
+    def to_tuple(self) -> tuple:
+        """
+        Converts the Vacancy object to a tuple of its attributes in the order of FIELDS.
+        The compact form of a vacancy for passing between processes.
+
+        Returns:
+            tuple: The vacancy attributes.
+        """
+        return (self.title, self.vacancy_url, self.salary_from, self.salary_to,
+                self.employer, self.city, self.requirements)
+
+    @classmethod
+    def from_tuple(cls, row: tuple) -> 'Vacancy':
+        """
+        Creates a Vacancy object from a tuple made by to_tuple without validating the attributes.
+
+        Args:
+            row (tuple): The vacancy attributes in the order of FIELDS.
+        Returns:
+            Vacancy: The created vacancy.
+        """
+        return cls.from_trusted(*row)
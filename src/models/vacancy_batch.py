@@ -0,0 +1,277 @@
+import heapq
+import math
+from array import array
+
+from src.models.vacancy import Vacancy
+from src.search_index import city_matcher
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NAN = float('nan')
+
+
+def _to_float(value) -> float:
+    """Converts a salary value from a Vacancy, a JSON or a CSV record to float, NaN if it is missing"""
+    if value is None or value == '':
+        return NAN
+    return float(value)
+
+
+def _to_salary(value: float):
+    """Converts a salary value from a column back to the form used in Vacancy"""
+    if math.isnan(value):
+        return None
+    return int(value) if value.is_integer() else value
+
+
+class VacancyBatch:
+    """
+    Columnar container of vacancies for fast filtering and ranking of large result sets.
+
+    Salaries are kept in float columns with NaN marking missing values, cities and employers
+    are dictionary-encoded: every row stores an integer code pointing to a list of distinct values.
+    Operations are vectorized with NumPy when it is installed and fall back to loops over
+    `array` columns otherwise.
+
+    Attributes:
+        titles (list[str]): The titles of the vacancies.
+        vacancy_urls (list[str]): The URL links to the vacancies.
+        requirements (list[str]): The requirements for the vacancies.
+        salary_from: Column of minimum salaries.
+        salary_to: Column of maximum salaries.
+        salary_comparison: Column of average salaries, NaN unless both bounds are known.
+        city_codes: Column of city codes, indices into `cities`.
+        cities (list[str]): Distinct cities.
+        employer_codes: Column of employer codes, indices into `employers`.
+        employers (list[str]): Distinct employers.
+    """
+
+    SALARY_KEYS = ('salary_from', 'salary_to', 'salary_comparison')
+
+    def __init__(self, titles, vacancy_urls, requirements, salary_from, salary_to, salary_comparison,
+                 city_codes, cities, employer_codes, employers) -> None:
+        """
+        Initializes a VacancyBatch from ready columns, use from_vacancies to build a batch from vacancies.
+        """
+        self.titles = titles
+        self.vacancy_urls = vacancy_urls
+        self.requirements = requirements
+        self.salary_from = salary_from
+        self.salary_to = salary_to
+        self.salary_comparison = salary_comparison
+        self.city_codes = city_codes
+        self.cities = cities
+        self.employer_codes = employer_codes
+        self.employers = employers
+
+    @classmethod
+    def from_vacancies(cls, vacancies) -> 'VacancyBatch':
+        """
+        Builds a batch from Vacancy objects or vacancy dictionaries loaded from a file.
+
+        Args:
+            vacancies: Iterable of Vacancy objects or dictionaries with the Vacancy keys.
+        Returns:
+            VacancyBatch: The batch holding the vacancies.
+        """
+        titles, vacancy_urls, requirements = [], [], []
+        salary_from, salary_to, salary_comparison = array('d'), array('d'), array('d')
+        city_codes, employer_codes = array('I'), array('I')
+        cities, employers = {}, {}
+
+        for vacancy in vacancies:
+            titles.append(vacancy['title'])
+            vacancy_urls.append(vacancy['vacancy_url'])
+            requirements.append(vacancy['requirements'])
+
+            low = _to_float(vacancy['salary_from'])
+            high = _to_float(vacancy['salary_to'])
+            salary_from.append(low)
+            salary_to.append(high)
+            # NaN propagates, so the average is missing unless both bounds are known
+            salary_comparison.append((low + high) / 2)
+
+            city_codes.append(cities.setdefault(vacancy['city'], len(cities)))
+            employer_codes.append(employers.setdefault(vacancy['employer'], len(employers)))
+
+        columns = [salary_from, salary_to, salary_comparison, city_codes, employer_codes]
+        if np is not None:
+            columns = [np.frombuffer(column, dtype=column.typecode).copy() for column in columns]
+
+        return cls(titles, vacancy_urls, requirements, *columns[:3],
+                   columns[3], list(cities), columns[4], list(employers))
+
+    def __len__(self) -> int:
+        """Returns the number of vacancies in the batch"""
+        return len(self.titles)
+
+    def _column(self, key: str):
+        """Returns the salary column by its name"""
+        if key not in self.SALARY_KEYS:
+            raise KeyError(f"'{key}' is not a salary column of VacancyBatch")
+        return getattr(self, key)
+
+    def take(self, indices) -> 'VacancyBatch':
+        """
+        Builds a new batch from the rows with the given indices, in the given order.
+
+        Args:
+            indices: Sequence of row indices.
+        Returns:
+            VacancyBatch: The batch with the selected rows.
+        """
+        if np is not None:
+            indices = np.asarray(indices, dtype=np.intp)
+            pick = lambda column: column[indices]
+        else:
+            pick = lambda column: array(column.typecode, (column[i] for i in indices))
+
+        return VacancyBatch([self.titles[i] for i in indices],
+                            [self.vacancy_urls[i] for i in indices],
+                            [self.requirements[i] for i in indices],
+                            pick(self.salary_from), pick(self.salary_to), pick(self.salary_comparison),
+                            pick(self.city_codes), self.cities, pick(self.employer_codes), self.employers)
+
+    def salary_indices(self, min_salary: float = None, max_salary: float = None, key: str = 'salary_from'):
+        """
+        Finds the rows whose salary is within the given bounds, rows with a missing salary never match.
+
+        Args:
+            min_salary: Lower bound of the salary, inclusive, no bound if None.
+            max_salary: Upper bound of the salary, inclusive, no bound if None.
+            key: Salary column to compare: salary_from, salary_to or salary_comparison.
+        Returns:
+            Indices of the matching rows in ascending order.
+        """
+        column = self._column(key)
+        low = -math.inf if min_salary is None else min_salary
+        high = math.inf if max_salary is None else max_salary
+
+        if np is not None:
+            return np.flatnonzero((column >= low) & (column <= high))
+        return [i for i, value in enumerate(column) if low <= value <= high]
+
+    def filter_by_salary(self, min_salary: float = None, max_salary: float = None,
+                         key: str = 'salary_from') -> 'VacancyBatch':
+        """
+        Selects the vacancies whose salary is within the given bounds.
+
+        Args:
+            min_salary: Lower bound of the salary, inclusive, no bound if None.
+            max_salary: Upper bound of the salary, inclusive, no bound if None.
+            key: Salary column to compare: salary_from, salary_to or salary_comparison.
+        Returns:
+            VacancyBatch: The batch with the matching vacancies.
+        """
+        return self.take(self.salary_indices(min_salary, max_salary, key))
+
+    def filter_by_city(self, city_criteria: str) -> 'VacancyBatch':
+        """
+        Selects the vacancies whose city contains the criteria, like the get_vacancies_by_city of the savers.
+        The criteria is checked once per distinct city, then rows are selected by city code.
+        Cities are compared ignoring case, hyphens and the difference between 'е' and 'ё'.
+
+        Args:
+            city_criteria: The city criteria to filter vacancies.
+        Returns:
+            VacancyBatch: The batch with the matching vacancies.
+        """
+        matches = city_matcher(city_criteria)
+        codes = [code for code, city in enumerate(self.cities) if matches(city)]
+
+        if np is not None:
+            return self.take(np.flatnonzero(np.isin(self.city_codes, codes)))
+        codes = set(codes)
+        return self.take([i for i, code in enumerate(self.city_codes) if code in codes])
+
+    def sorted_indices(self, key: str = 'salary_comparison', descending: bool = True):
+        """
+        Orders the rows by salary, rows with a missing salary go last.
+
+        Args:
+            key: Salary column to sort by: salary_from, salary_to or salary_comparison.
+            descending: Whether the highest salaries go first.
+        Returns:
+            Indices of the rows in sorted order.
+        """
+        column = self._column(key)
+
+        if np is not None:
+            # NaN is sorted to the end, so the descending order is built on negated values
+            order = np.argsort(-column if descending else column, kind='stable')
+            return order
+        present = [i for i, value in enumerate(column) if not math.isnan(value)]
+        missing = [i for i, value in enumerate(column) if math.isnan(value)]
+        present.sort(key=column.__getitem__, reverse=descending)
+        return present + missing
+
+    def sort_by(self, key: str = 'salary_comparison', descending: bool = True) -> 'VacancyBatch':
+        """
+        Sorts the vacancies by salary, vacancies with a missing salary go last.
+
+        Args:
+            key: Salary column to sort by: salary_from, salary_to or salary_comparison.
+            descending: Whether the highest salaries go first.
+        Returns:
+            VacancyBatch: The sorted batch.
+        """
+        return self.take(self.sorted_indices(key, descending))
+
+    def top_indices(self, top_number: int, key: str = 'salary_comparison', missing: float = -math.inf):
+        """
+        Finds the N rows with the highest salary without sorting the whole batch.
+        Rows with equal salaries keep their order.
+
+        Args:
+            top_number: The number of top N rows to find.
+            key: Salary column to rank by: salary_from, salary_to or salary_comparison.
+            missing: Rank of the rows with a missing salary, they go last by default.
+        Returns:
+            Indices of the top N rows, the highest salary first.
+        """
+        column = self._column(key)
+        count = len(self)
+        top_number = min(top_number, count)
+        if top_number <= 0:
+            return []
+
+        if np is not None:
+            ranked = np.where(np.isnan(column), missing, column)
+            # All rows tied with the N-th highest salary are candidates, so ties keep the row order
+            threshold = np.partition(ranked, count - top_number)[count - top_number]
+            candidates = np.flatnonzero(ranked >= threshold)
+            return candidates[np.lexsort((candidates, -ranked[candidates]))][:top_number]
+
+        ranked = lambda i: missing if math.isnan(column[i]) else column[i]
+        return heapq.nlargest(top_number, range(count), key=ranked)
+
+    def top(self, top_number: int, key: str = 'salary_comparison') -> 'VacancyBatch':
+        """
+        Selects the N vacancies with the highest salary without sorting the whole batch.
+
+        Args:
+            top_number: The number of top N vacancies to retrieve.
+            key: Salary column to rank by: salary_from, salary_to or salary_comparison.
+        Returns:
+            VacancyBatch: The top N vacancies, the highest salary first.
+        """
+        return self.take(self.top_indices(top_number, key))
+
+    def to_vacancies(self) -> list[Vacancy]:
+        """
+        Converts the batch back to Vacancy objects.
+
+        Returns:
+            list[Vacancy]: The vacancies of the batch in row order.
+        """
+        return [Vacancy.from_trusted(title=self.titles[i],
+                                     vacancy_url=self.vacancy_urls[i],
+                                     salary_from=_to_salary(float(self.salary_from[i])),
+                                     salary_to=_to_salary(float(self.salary_to[i])),
+                                     employer=self.employers[self.employer_codes[i]],
+                                     city=self.cities[self.city_codes[i]],
+                                     requirements=self.requirements[i])
+                for i in range(len(self))]
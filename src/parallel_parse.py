@@ -0,0 +1,168 @@
+"""Parsing of large dumps of raw API pages in several processes"""
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, Union
+
+from src.api_classes import HeadHunterAPI, SuperJobAPI
+from src.models.vacancy import Vacancy
+
+# Parsers of the platforms by the names used in the dumps
+PARSERS = {
+    HeadHunterAPI.PLATFORM: HeadHunterAPI,
+    SuperJobAPI.PLATFORM: SuperJobAPI,
+}
+
+# Parser of the worker process, created once per process by _init_worker
+_worker_api = None
+
+Page = Union[dict, str, bytes]
+
+
+def _init_worker(platform: str) -> None:
+    """Creates the parser of the platform in a worker process"""
+    global _worker_api
+    _worker_api = PARSERS[platform](use_cache=False)
+
+
+def _parse_pages(pages: list) -> list[tuple]:
+    """
+    Parses a shard of pages in a worker process.
+
+    :param pages: Raw pages: decoded API responses or their JSON text.
+    :return: Vacancies of the pages in order, as tuples made by Vacancy.to_tuple.
+    """
+    rows = []
+    for page in pages:
+        if isinstance(page, (str, bytes)):
+            page = json.loads(page)
+        rows.extend(vacancy.to_tuple() for vacancy in _worker_api.iter_parse(page))
+    return rows
+
+
+def iter_dump_pages(file_path: str) -> Iterator[bytes]:
+    """
+    Reads a dump of raw API pages, one JSON response per line, without decoding it.
+    The pages are decoded in the worker processes.
+
+    :param file_path: Path to the dump file.
+    :return: Generator of the JSON text of the pages.
+    """
+    with open(file_path, 'rb') as file:
+        for line in file:
+            if line.strip():
+                yield line
+
+
+class ParallelParser:
+    """
+    Parses raw API pages of a platform in a pool of processes.
+
+    Pages are grouped into shards of pages_per_task pages, every shard is parsed by one worker and
+    comes back as a list of tuples, which are much cheaper to pickle than Vacancy objects.
+    Only a bounded number of shards is in flight, so a dump is never held in memory as a whole,
+    and results are yielded in the order of the pages.
+    """
+
+    def __init__(self, platform: str, max_workers: int = None, pages_per_task: int = 8) -> None:
+        """
+        Initializes the parser.
+
+        :param platform: Name of the platform of the pages: 'HeadHunter' or 'SuperJob'.
+        :param max_workers: Number of worker processes, the number of CPUs by default.
+        :param pages_per_task: Number of pages sent to a worker at once.
+        """
+        if platform not in PARSERS:
+            raise ValueError(f"Platform must be one of {list(PARSERS)}")
+        self.platform = platform
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.pages_per_task = pages_per_task
+        self.pages = 0
+        self.vacancies = 0
+        self.seconds = 0.0
+
+    def _shards(self, pages: Iterable[Page]) -> Iterator[list]:
+        """Groups the pages into shards and counts them"""
+        shard = []
+        for page in pages:
+            shard.append(page)
+            self.pages += 1
+            if len(shard) == self.pages_per_task:
+                yield shard
+                shard = []
+        if shard:
+            yield shard
+
+    def iter_rows(self, pages: Iterable[Page]) -> Iterator[tuple]:
+        """
+        Parses the pages in the worker processes.
+
+        :param pages: Iterable of raw pages: decoded API responses or their JSON text.
+        :return: Generator of vacancies as tuples made by Vacancy.to_tuple, in the order of the pages.
+        """
+        self.pages = self.vacancies = 0
+        started = time.perf_counter()
+        max_in_flight = self.max_workers * 2
+
+        with ProcessPoolExecutor(self.max_workers, initializer=_init_worker,
+                                 initargs=(self.platform,)) as executor:
+            in_flight = deque()
+            for shard in self._shards(pages):
+                in_flight.append(executor.submit(_parse_pages, shard))
+                if len(in_flight) >= max_in_flight:
+                    yield from self._collect(in_flight.popleft().result())
+            while in_flight:
+                yield from self._collect(in_flight.popleft().result())
+
+        self.seconds = time.perf_counter() - started
+
+    def _collect(self, rows: list[tuple]) -> list[tuple]:
+        """Counts the vacancies of a parsed shard"""
+        self.vacancies += len(rows)
+        return rows
+
+    def parse(self, pages: Iterable[Page]) -> list[Vacancy]:
+        """
+        Parses the pages in the worker processes.
+
+        :param pages: Iterable of raw pages: decoded API responses or their JSON text.
+        :return: List of parsed Vacancy objects in the order of the pages.
+        """
+        return [Vacancy.from_tuple(row) for row in self.iter_rows(pages)]
+
+    def throughput(self) -> float:
+        """
+        Returns the number of vacancies parsed per second by the last run.
+        """
+        return self.vacancies / self.seconds if self.seconds else 0.0
+
+    def report(self) -> str:
+        """
+        Returns a summary of the last run.
+        """
+        return (f'{self.platform}: {self.vacancies} vacancies from {self.pages} pages parsed in '
+                f'{self.seconds:.2f} s by {self.max_workers} processes, {self.throughput():.0f} vacancies/s')
+
+
+def main(platform: str, file_path: str, max_workers: int = None) -> None:
+    """
+    Parses a dump of raw API pages and prints the throughput.
+
+    :param platform: Name of the platform of the pages: 'HeadHunter' or 'SuperJob'.
+    :param file_path: Path to the dump file, one JSON response per line.
+    :param max_workers: Number of worker processes, the number of CPUs by default.
+    """
+    parser = ParallelParser(platform, max_workers)
+    for _ in parser.iter_rows(iter_dump_pages(file_path)):
+        pass
+    print(parser.report())
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (3, 4):
+        print('Usage: python -m src.parallel_parse HeadHunter|SuperJob DUMP_FILE [WORKERS]')
+        sys.exit(1)
+    main(sys.argv[1], sys.argv[2], int(sys.argv[3]) if len(sys.argv) == 4 else None)
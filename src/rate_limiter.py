@@ -0,0 +1,137 @@
+"""Request rate limiting and retries with backoff for the platform APIs"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# Status codes after which a request is worth repeating
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting the rate of requests.
+
+    Tokens are added continuously at `rate` per second up to `capacity`,
+    every request takes one token and waits if the bucket is empty.
+    """
+
+    def __init__(self, rate: float, capacity: int = 1) -> None:
+        """
+        Initializes a TokenBucket instance with a full bucket.
+
+        Args:
+            rate: Number of requests allowed per second on average.
+            capacity: Maximum number of requests allowed in a burst.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Takes a token, waiting until one is available.
+
+        Returns:
+            Time in seconds spent waiting.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            # The token is taken right away, concurrent callers queue up behind the debt
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """
+        Stops handing out tokens for the given time, e.g. when the platform asked to retry later.
+
+        Args:
+            seconds: Duration of the pause in seconds.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class RetryPolicy:
+    """
+    Retry schedule with exponential backoff and full jitter that honours the Retry-After header.
+    """
+
+    def __init__(self, max_retries: int = 4, base_delay: float = 0.5, max_delay: float = 30.0) -> None:
+        """
+        Initializes a RetryPolicy instance.
+
+        Args:
+            max_retries: Maximum number of repeated attempts of a request.
+            base_delay: Upper bound of the delay before the first retry in seconds.
+            max_delay: Upper bound of any delay in seconds.
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: str = None) -> float:
+        """
+        Calculates the delay before the next attempt.
+
+        Args:
+            attempt: Number of the failed attempt, starting from 0.
+            retry_after: Value of the Retry-After header of the failed response.
+        Returns:
+            Delay in seconds.
+        """
+        requested = parse_retry_after(retry_after)
+        if requested is not None:
+            return min(requested, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+def parse_retry_after(value: str):
+    """
+    Parses the Retry-After header given either in seconds or as an HTTP date.
+
+    Args:
+        value: Value of the header.
+    Returns:
+        Delay in seconds or None if the header is missing or malformed.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def get_rate_limiter(platform: str, rate: float, capacity: int = 1) -> TokenBucket:
+    """
+    Returns the rate limiter of a platform shared by all threads and API instances.
+
+    Args:
+        platform: Name of the platform.
+        rate: Number of requests allowed per second, used when the limiter is created.
+        capacity: Maximum number of requests allowed in a burst, used when the limiter is created.
+    Returns:
+        Shared token bucket of the platform.
+    """
+    with _limiters_lock:
+        if platform not in _limiters:
+            _limiters[platform] = TokenBucket(rate, capacity)
+        return _limiters[platform]
@@ -0,0 +1,164 @@
+"""Sorted salary index for range queries over saved vacancies"""
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+# Salaries by which the index is sorted
+INDEX_KEYS = ('salary_from', 'salary_to', 'average')
+
+_MAGIC = b'SALX'
+# Magic, modification time and size of the indexed file
+_HEADER = struct.Struct('<4sqq')
+_COUNT = struct.Struct('<Q')
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def parse_salary(value):
+    """Converts a salary of a Vacancy, a JSON or a CSV record to float, None if it is missing"""
+    if value is None or value == '':
+        return None
+    return float(value)
+
+
+class SalaryIndex:
+    """
+    Sorted arrays of salaries with the positions of the vacancies in the file, one pair per key.
+    The bounds of a range are found with bisect in O(log n), then the positions of the k matches are sorted
+    back into file order, so a query costs O(log n + k log k).
+    Vacancies with a missing salary are not indexed by that key, the average is indexed
+    only for vacancies with both salary bounds.
+    """
+
+    def __init__(self, columns: dict) -> None:
+        """
+        Initializes a SalaryIndex from ready columns, use build to index vacancies.
+
+        Args:
+            columns: Dictionary of key -> (sorted array of salaries, array of positions).
+        """
+        self._columns = columns
+
+    @classmethod
+    def build(cls, vacancies) -> 'SalaryIndex':
+        """
+        Indexes vacancies.
+
+        Args:
+            vacancies: Iterable of vacancies in file order.
+        Returns:
+            SalaryIndex: The index of the vacancies.
+        """
+        entries = {key: [] for key in INDEX_KEYS}
+        for position, vacancy in enumerate(vacancies):
+            salary_from, salary_to = parse_salary(vacancy['salary_from']), parse_salary(vacancy['salary_to'])
+            if salary_from is not None:
+                entries['salary_from'].append((salary_from, position))
+            if salary_to is not None:
+                entries['salary_to'].append((salary_to, position))
+            if salary_from is not None and salary_to is not None:
+                entries['average'].append(((salary_from + salary_to) / 2, position))
+
+        columns = {}
+        for key, pairs in entries.items():
+            pairs.sort()
+            columns[key] = (array('d', (value for value, _ in pairs)), array('Q', (position for _, position in pairs)))
+        return cls(columns)
+
+    def range(self, key: str = 'salary_from', min_salary: float = None, max_salary: float = None) -> list[int]:
+        """
+        Finds the vacancies whose salary is within the given bounds.
+
+        Args:
+            key: Salary to compare: 'salary_from', 'salary_to' or 'average'.
+            min_salary: Lower bound of the salary, inclusive, no bound if None.
+            max_salary: Upper bound of the salary, inclusive, no bound if None.
+        Returns:
+            Positions of the matching vacancies in the file, in file order.
+        """
+        if key not in INDEX_KEYS:
+            raise ValueError(f"Salary key must be one of {INDEX_KEYS}")
+        values, positions = self._columns[key]
+        start = 0 if min_salary is None else bisect_left(values, min_salary)
+        end = len(values) if max_salary is None else bisect_right(values, max_salary)
+        return sorted(positions[start:end])
+
+    def save(self, path: str, signature: tuple) -> None:
+        """
+        Saves the index to a binary file.
+
+        Args:
+            path: Path to the index file.
+            signature: Modification time and size of the indexed file.
+        """
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(_HEADER.pack(_MAGIC, *signature))
+            for key in INDEX_KEYS:
+                values, positions = self._columns[key]
+                file.write(_COUNT.pack(len(values)))
+                values.tofile(file)
+                positions.tofile(file)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, signature: tuple):
+        """
+        Loads the index from a binary file if it was built for the given version of the indexed file.
+
+        Args:
+            path: Path to the index file.
+            signature: Modification time and size of the indexed file.
+        Returns:
+            SalaryIndex or None if the index file is missing or outdated.
+        """
+        try:
+            with open(path, 'rb') as file:
+                magic, mtime, size = _HEADER.unpack(file.read(_HEADER.size))
+                if magic != _MAGIC or (mtime, size) != tuple(signature):
+                    return None
+                columns = {}
+                for key in INDEX_KEYS:
+                    count = _COUNT.unpack(file.read(_COUNT.size))[0]
+                    values, positions = array('d'), array('Q')
+                    values.fromfile(file, count)
+                    positions.fromfile(file, count)
+                    columns[key] = (values, positions)
+        except (OSError, EOFError, struct.error):
+            return None
+        return cls(columns)
+
+
+def get_salary_index(data_path: str, load_vacancies) -> SalaryIndex:
+    """
+    Returns the salary index of a file with vacancies.
+    The index is kept in memory and in a file next to the data file, and is rebuilt
+    only when the modification time or size of the data file changes.
+
+    Args:
+        data_path: Path to the file with vacancies.
+        load_vacancies: Function returning the vacancies of the file in file order, called to rebuild the index.
+    Returns:
+        SalaryIndex: The index of the file.
+    """
+    path = os.path.abspath(data_path)
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    with _indexes_lock:
+        cached = _indexes.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    index_path = f'{path}.salidx'
+    index = SalaryIndex.load(index_path, signature)
+    if index is None:
+        index = SalaryIndex.build(load_vacancies())
+        index.save(index_path, signature)
+
+    with _indexes_lock:
+        _indexes[path] = (signature, index)
+    return index
@@ -0,0 +1,211 @@
+"""Conversion of salaries in different currencies and before or after tax to comparable net roubles"""
+import json
+import math
+import os
+import threading
+import time
+
+import requests
+
+from src.http_session import get_default_session
+
+# The path to save the currency rates table
+RATES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'saved_vacancies', 'currency_rates.json')
+# HeadHunter publishes the rates of the currencies it supports in its dictionaries
+RATES_URL = 'https://api.hh.ru/dictionaries'
+RATES_TTL = 24 * 60 * 60
+
+# Code of the rouble in HeadHunter, the unit of normalized salaries
+BASE_CURRENCY = 'RUR'
+# Codes used by SuperJob or ISO 4217 that HeadHunter names differently
+CURRENCY_ALIASES = {'RUB': 'RUR', 'BYN': 'BYR'}
+# Personal income tax withheld from gross salaries
+INCOME_TAX = 0.13
+
+# Units of a currency per rouble, used until the rates have been downloaded once
+DEFAULT_RATES = {
+    'RUR': 1.0,
+    'USD': 0.0111,
+    'EUR': 0.0102,
+    'KZT': 5.62,
+    'UAH': 0.459,
+    'BYR': 0.0362,
+    'UZS': 140.0,
+    'AZN': 0.0189,
+    'GEL': 0.0301,
+    'KGS': 0.97,
+}
+
+_default_normalizer = None
+_default_normalizer_lock = threading.Lock()
+
+
+def currency_code(currency) -> str:
+    """
+    Brings a currency code of HeadHunter or SuperJob to the HeadHunter form: 'rub' -> 'RUR'.
+
+    :param currency: Currency code, the rouble if None.
+    :return: Normalized currency code.
+    """
+    if not currency:
+        return BASE_CURRENCY
+    code = currency.upper()
+    return CURRENCY_ALIASES.get(code, code)
+
+
+class SalaryNormalizer:
+    """
+    Converts salaries to net roubles, so that salaries of all vacancies can be compared.
+
+    The rates table is kept in a local file and downloaded again once a day. The APIs load it with
+    load_rates before fetching the first page, so parsing never waits on the network. Conversion works
+    on whole columns: a factor is computed once per distinct (currency, gross) pair and columns of
+    rouble salaries are returned as they are.
+    """
+
+    def __init__(self, rates_path: str = RATES_PATH, rates_ttl: float = RATES_TTL,
+                 session: requests.Session = None, rates: dict = None) -> None:
+        """
+        Initializes the normalizer.
+
+        :param rates_path: Path to the file with the cached rates table.
+        :param rates_ttl: Age in seconds after which the rates are downloaded again.
+        :param session: HTTP session used to download the rates, the shared pooled session by default.
+        :param rates: Fixed rates table (units of a currency per rouble), nothing is downloaded if given.
+        """
+        self.rates_path = rates_path
+        self.rates_ttl = rates_ttl
+        self._session = session
+        self._rates = rates
+        self._factors = {}
+        self._lock = threading.Lock()
+
+    @property
+    def rates(self) -> dict:
+        """Returns the rates table, loading it if load_rates has not been called yet"""
+        return self.load_rates()
+
+    def load_rates(self) -> dict:
+        """
+        Loads the rates table once, from the local file or from HeadHunter when the file is stale.
+        Later calls return the loaded table without touching the disk or the network.
+
+        :return: Rates table, units of a currency per rouble.
+        """
+        if self._rates is None:
+            with self._lock:
+                if self._rates is None:
+                    self._rates = self._load_rates()
+        return self._rates
+
+    def _read_cached_rates(self):
+        """Returns the content of the rates file, None if it is missing or corrupt"""
+        try:
+            with open(self.rates_path, 'r', encoding='utf-8') as file:
+                cached = json.load(file)
+            if isinstance(cached['rates'], dict) and isinstance(cached['updated_at'], (int, float)):
+                return cached
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return None
+
+    def _load_rates(self) -> dict:
+        """
+        Returns the cached rates if they are fresh, otherwise downloads them, falling back to any known rates.
+        A corrupt rates file is treated as a missing one and replaced by the downloaded rates.
+        """
+        cached = self._read_cached_rates()
+        if cached is not None and time.time() - cached['updated_at'] < self.rates_ttl:
+            return cached['rates']
+
+        rates = self._download_rates()
+        if rates is not None:
+            tmp_path = f'{self.rates_path}.tmp'
+            os.makedirs(os.path.dirname(self.rates_path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump({'updated_at': time.time(), 'rates': rates}, file, indent=2)
+            os.replace(tmp_path, self.rates_path)
+            return rates
+        return cached['rates'] if cached is not None else dict(DEFAULT_RATES)
+
+    def _download_rates(self):
+        """Downloads the rates table from HeadHunter, None if it is unavailable"""
+        try:
+            response = (self._session or get_default_session()).get(RATES_URL, timeout=10)
+            if response.status_code != 200:
+                return None
+            return {currency['code']: currency['rate'] for currency in response.json()['currency']}
+        except (requests.RequestException, ValueError, KeyError):
+            return None
+
+    def factor(self, currency=None, gross: bool = False) -> float:
+        """
+        Returns the multiplier converting a salary to net roubles.
+
+        :param currency: Currency code of HeadHunter or SuperJob, the rouble if None.
+        :param gross: Whether the salary is before tax.
+        :return: The multiplier, NaN if the rate of the currency is unknown.
+        """
+        key = (currency, bool(gross))
+        factor = self._factors.get(key)
+        if factor is None:
+            code = currency_code(currency)
+            if code == BASE_CURRENCY:
+                factor = 1.0
+            else:
+                rate = self.rates.get(code)
+                factor = 1.0 / rate if rate else math.nan
+            if gross:
+                factor *= 1 - INCOME_TAX
+            self._factors[key] = factor
+        return factor
+
+    def normalize_columns(self, salary_from: list, salary_to: list, currencies: list, gross: list = None):
+        """
+        Converts columns of salaries to net roubles.
+
+        :param salary_from: Minimum salaries, None where missing.
+        :param salary_to: Maximum salaries, None where missing.
+        :param currencies: Currency codes of the salaries.
+        :param gross: Flags of salaries before tax, all after tax if None.
+        :return: Tuple of the converted salary_from and salary_to lists, salaries are rounded to whole
+            roubles and are None where missing or in a currency without a known rate.
+        """
+        if gross is None:
+            gross = [False] * len(currencies)
+        factor = self.factor
+        factors = [factor(currency, flag) for currency, flag in zip(currencies, gross)]
+        if all(value == 1.0 for value in factors):
+            return list(salary_from), list(salary_to)
+        return _scale(salary_from, factors), _scale(salary_to, factors)
+
+
+def _scale(salaries: list, factors: list) -> list:
+    """
+    Multiplies the salaries by the factors and rounds them, salaries with a factor of 1.0 are kept as they are,
+    missing and unconvertible salaries become None
+    """
+    scaled = []
+    for salary, factor in zip(salaries, factors):
+        if salary is None or factor != factor:
+            scaled.append(None)
+        elif factor == 1.0:
+            scaled.append(salary)
+        else:
+            scaled.append(round(salary * factor))
+    return scaled
+
+
+def get_default_normalizer() -> SalaryNormalizer:
+    """
+    Returns the normalizer shared by all API instances, creating it on the first call.
+
+    :return: Shared salary normalizer.
+    """
+    global _default_normalizer
+    if _default_normalizer is None:
+        with _default_normalizer_lock:
+            if _default_normalizer is None:
+                _default_normalizer = SalaryNormalizer()
+    return _default_normalizer
@@ -0,0 +1,240 @@
+"""In-memory inverted index over saved vacancies for city and keyword search"""
+import os
+import re
+import threading
+
+# Latin letters that look like Cyrillic ones and are often typed by mistake in Russian words
+_HOMOGLYPHS = str.maketrans('aceopxykmthb', 'асеорхукмтнв')
+_TAG_RE = re.compile(r'<[^>]+>')
+_TOKEN_RE = re.compile(r'\w+')
+_SEPARATORS_RE = re.compile(r'[\s\-‐–—]+')
+_CYRILLIC_RE = re.compile('[а-я]')
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def normalize_word(word: str) -> str:
+    """
+    Brings a word to the form used in the index: lower case, 'ё' replaced with 'е'
+    and, in words with Cyrillic letters, Latin look-alike letters replaced with Cyrillic ones.
+
+    Args:
+        word: The word to normalize.
+    Returns:
+        The normalized word.
+    """
+    word = word.casefold().replace('ё', 'е')
+    if _CYRILLIC_RE.search(word):
+        word = word.translate(_HOMOGLYPHS)
+    return word
+
+
+def normalize_city(city: str) -> str:
+    """
+    Brings a city name to the form used in the index, so 'Санкт-Петербург', 'санкт петербург'
+    and 'САНКТ-ПЕТЕРБУРГ' are the same city.
+
+    Args:
+        city: The city name.
+    Returns:
+        The normalized city name.
+    """
+    return ' '.join(normalize_word(part) for part in _SEPARATORS_RE.split(city.strip()) if part)
+
+
+def city_matcher(city_criteria: str):
+    """
+    Returns a function checking whether a city contains the criteria, both compared in the normalized form
+    like in VacancyIndex.find_by_city. Every distinct city is normalized once.
+
+    Args:
+        city_criteria: The city criteria to filter vacancies.
+    Returns:
+        Function of a city name returning a bool.
+    """
+    criteria = normalize_city(city_criteria)
+    matched = {}
+
+    def matches(city: str) -> bool:
+        result = matched.get(city)
+        if result is None:
+            result = matched[city] = criteria in normalize_city(city)
+        return result
+    return matches
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Splits a title or requirements into normalized words, HTML tags of the platforms are dropped.
+
+    Args:
+        text: The text to split.
+    Returns:
+        List of normalized words.
+    """
+    if not text:
+        return []
+    return [normalize_word(token) for token in _TOKEN_RE.findall(_TAG_RE.sub(' ', text))]
+
+
+class VacancyIndex:
+    """
+    Inverted index over vacancies: a normalized city index and a word index over title and requirements.
+
+    Every added vacancy gets an increasing id, search results are returned in the order of addition.
+    The index is updated incrementally with add, remove and remove_title.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty VacancyIndex.
+        """
+        self._vacancies = {}
+        self._next_id = 0
+        self._cities = {}
+        self._words = {}
+        self._titles = {}
+
+    def __len__(self) -> int:
+        """Returns the number of indexed vacancies"""
+        return len(self._vacancies)
+
+    def add(self, vacancies) -> list[int]:
+        """
+        Adds vacancies to the index.
+
+        Args:
+            vacancies: Iterable of Vacancy objects or vacancy dictionaries.
+        Returns:
+            Ids assigned to the vacancies.
+        """
+        ids = []
+        for vacancy in vacancies:
+            vacancy_id = self._next_id
+            self._next_id += 1
+            self._vacancies[vacancy_id] = vacancy
+
+            self._cities.setdefault(normalize_city(vacancy['city']), set()).add(vacancy_id)
+            self._titles.setdefault(vacancy['title'], set()).add(vacancy_id)
+            for word in set(tokenize(vacancy['title']) + tokenize(vacancy['requirements'])):
+                self._words.setdefault(word, set()).add(vacancy_id)
+            ids.append(vacancy_id)
+        return ids
+
+    def remove(self, vacancy_id: int) -> None:
+        """
+        Removes a vacancy from the index.
+
+        Args:
+            vacancy_id: Id of the vacancy.
+        """
+        vacancy = self._vacancies.pop(vacancy_id, None)
+        if vacancy is None:
+            return
+
+        self._discard(self._cities, normalize_city(vacancy['city']), vacancy_id)
+        self._discard(self._titles, vacancy['title'], vacancy_id)
+        for word in set(tokenize(vacancy['title']) + tokenize(vacancy['requirements'])):
+            self._discard(self._words, word, vacancy_id)
+
+    def remove_title(self, title: str) -> None:
+        """
+        Removes all vacancies with the given title from the index, like delete_vacancy of the savers.
+
+        Args:
+            title: Exact title of the vacancies.
+        """
+        for vacancy_id in list(self._titles.get(title, ())):
+            self.remove(vacancy_id)
+
+    @staticmethod
+    def _discard(postings: dict, key: str, vacancy_id: int) -> None:
+        """Removes the id from the posting list of the key and drops empty lists"""
+        ids = postings.get(key)
+        if ids is not None:
+            ids.discard(vacancy_id)
+            if not ids:
+                del postings[key]
+
+    def _result(self, ids) -> list:
+        """Returns the vacancies with the given ids in the order of addition"""
+        return [self._vacancies[vacancy_id] for vacancy_id in sorted(ids)]
+
+    def find_by_city(self, city_criteria: str) -> list:
+        """
+        Finds the vacancies whose normalized city contains the normalized criteria.
+        The criteria is compared with the distinct cities only, then their posting lists are merged.
+
+        Args:
+            city_criteria: The city criteria to filter vacancies.
+        Returns:
+            List of matching vacancies.
+        """
+        criteria = normalize_city(city_criteria)
+        ids = set()
+        for city, city_ids in self._cities.items():
+            if criteria in city:
+                ids |= city_ids
+        return self._result(ids)
+
+    def search(self, query: str, match_all: bool = True) -> list:
+        """
+        Finds the vacancies whose title or requirements contain the words of the query.
+
+        Args:
+            query: Words to search for.
+            match_all: True to find vacancies containing all words (AND), False for any of them (OR).
+        Returns:
+            List of matching vacancies.
+        """
+        words = set(tokenize(query))
+        if not words:
+            return []
+        postings = sorted((self._words.get(word, set()) for word in words), key=len)
+
+        if match_all:
+            ids = set(postings[0])
+            for word_ids in postings[1:]:
+                ids &= word_ids
+                if not ids:
+                    break
+        else:
+            ids = set().union(*postings)
+        return self._result(ids)
+
+
+def _signature(path: str):
+    """Returns the modification time and size of a file, None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_search_index(data_paths: tuple, load_vacancies) -> VacancyIndex:
+    """
+    Returns the search index of a storage.
+    The index is kept in memory and is rebuilt only when the modification time or size of one
+    of the files of the storage changes.
+
+    Args:
+        data_paths: Paths to the files of the storage, the main file first. Missing files are allowed.
+        load_vacancies: Function returning the vacancies of the storage, called to rebuild the index.
+    Returns:
+        VacancyIndex: The index of the storage.
+    """
+    path = os.path.abspath(data_paths[0])
+    signature = tuple(_signature(data_path) for data_path in data_paths)
+
+    with _indexes_lock:
+        cached = _indexes.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    index = VacancyIndex()
+    index.add(load_vacancies())
+    with _indexes_lock:
+        _indexes[path] = (signature, index)
+    return index
@@ -17,6 +17,8 @@ def user_interaction():
         print("5 - Getting a vacancy from file based on the city")
         print("6 - Getting top N vacancies from a file")
         print("7 - Getting all vacancies from a file")
+        print("8 - Adding only new vacancies to a file")
+        print("9 - Searching vacancies in a file by keywords")
         print("0 - Completion of the program")
 
         choice = input("Enter the action number: ")
@@ -45,6 +47,12 @@ def user_interaction():
         elif choice == "7":
             get_all_vacancies(vacancies)
 
+        elif choice == "8":
+            update_vacancies()
+
+        elif choice == "9":
+            search_saved_vacancies(vacancies)
+
         elif choice == "0":
             print("Exiting the program")
             print("Thank you for using this program, come back again :)")
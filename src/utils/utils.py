@@ -1,19 +1,37 @@
 """Functions for executing the main logic of the program, which are passed to the main function for user interaction"""
 from src.api_classes import HeadHunterAPI, SuperJobAPI
-from src.file_saver import JsonSaver, CSVSaver
+from src.async_api_classes import AsyncHeadHunterAPI, AsyncSuperJobAPI, search_platforms
+from src.dedup import Deduplicator
+from src.file_saver import (JsonSaver, StreamingCSVSaver, SQLiteSaver, JsonLinesSaver, BinarySaver, ParquetSaver,
+                            RANKING_KEYS, add_new_vacancies, search_vacancies)
+import asyncio
 import os
 
 # The path to save files with vacancies
 file_path_json = '../job_parser/saved_vacancies/json_vacancies.json'
 file_path_csv = '../job_parser/saved_vacancies/csv_vacancies.csv'
+file_path_sqlite = '../job_parser/saved_vacancies/vacancies.db'
+file_path_jsonl = '../job_parser/saved_vacancies/jsonl_vacancies.jsonl'
+file_path_binary = '../job_parser/saved_vacancies/binary_vacancies.bin'
+file_path_parquet = '../job_parser/saved_vacancies/parquet_vacancies.parquet'
+
+# Storage formats in the order in which the files with vacancies are looked up
+storages = [
+    ('JSON', JsonSaver, file_path_json),
+    ('CSV', StreamingCSVSaver, file_path_csv),
+    ('SQLite', SQLiteSaver, file_path_sqlite),
+    ('JSON Lines', JsonLinesSaver, file_path_jsonl),
+    ('Binary', BinarySaver, file_path_binary),
+]
+# The Parquet storage is offered only when its optional dependency pyarrow is installed
+if ParquetSaver.available():
+    storages.append(('Parquet', ParquetSaver, file_path_parquet))
 
 
 def search_vacancy():
     """Function for getting vacancies from platforms"""
 
     platforms = ['HeadHunter', 'SuperJob']
-    hh_site = HeadHunterAPI()
-    sj_site = SuperJobAPI()
     print(f'Available platforms: {platforms}')
 
     input_platform = int(input(f'Choose a platform: 1 - HeadHunter, 2 - SuperJob, 3 - HeadHunter & SuperJob: \n'))
@@ -26,18 +44,24 @@ def search_vacancy():
     salary = int(input("Enter the minimum desired salary in RUB: "))
     quantity = int(input("Enter the number of vacancies to search(max 50): "))
 
-    hh_vacancies = []
-    sj_vacancies = []
+    sites = []
 
     if input_platform in [1, 3]:
-        vacancies = hh_site.get_vacancies(name, salary, quantity)
-        hh_vacancies = hh_site.parse(vacancies)
+        sites.append(AsyncHeadHunterAPI())
 
     if input_platform in [2, 3]:
-        vacancies = sj_site.get_vacancies(name, salary, quantity)
-        sj_vacancies = sj_site.parse(vacancies)
+        sites.append(AsyncSuperJobAPI())
+
+    # Both platforms are queried at the same time
+    all_vacancies = asyncio.run(search_platforms(sites, [name], salary, quantity))
+
+    # The same job is often published on both platforms
+    deduplicator = Deduplicator()
+    all_vacancies = deduplicator.filter(all_vacancies)
+    duplicates = deduplicator.exact_duplicates + deduplicator.near_duplicates
+    if duplicates:
+        print(f'Duplicate vacancies removed: {duplicates}')
 
-    all_vacancies = hh_vacancies + sj_vacancies
     if len(all_vacancies) > 0:
         print('Job search completed successfully')
     else:
@@ -45,19 +69,78 @@ def search_vacancy():
     return all_vacancies
 
 
-def save_vacancies(vacancies):
-    """Function for saving vacancies to a file"""
+def update_vacancies():
+    """Function for fetching only the vacancies published since the previous update and adding them to a file"""
+
+    input_platform = int(input('Choose a platform: 1 - HeadHunter, 2 - SuperJob, 3 - HeadHunter & SuperJob: \n'))
+
+    if input_platform not in [1, 2, 3]:
+        print("Incorrect choice of platform. Please choose 1, 2 or 3.")
+        return
+
+    name = input("Enter the job title: ")
+    salary = int(input("Enter the minimum desired salary in RUB: "))
+    quantity = int(input("Enter the number of vacancies to search(max 50): "))
+
+    new_vacancies = []
+    fetched = []
 
-    file_format = int(input('In what format do you want to save the file?\n 1 - JSON, 2 - CSV: '))
+    for platform, site in [(1, HeadHunterAPI), (2, SuperJobAPI)]:
+        if input_platform in [platform, 3]:
+            api = site()
+            data = api.get_new_vacancies(name, salary, quantity)
+            fetched.append((api, data))
+            new_vacancies += api.parse(data)
 
-    json_save = JsonSaver(vacancies, f'../job_parser/saved_vacancies/json_vacancies.json')
-    csv_save = CSVSaver(vacancies, f'../job_parser/saved_vacancies/csv_vacancies.csv')
+    storage_name, storage_class, file_path = choose_storage('To which file do you want to add new vacancies?')
+    if storage_class is None:
+        return
+
+    # Vacancies already saved in previous runs and their copies from the other platform are skipped
+    deduplicator = Deduplicator()
+    if os.path.isfile(file_path):
+        for vacancy in storage_class([], file_path).load_from_file():
+            deduplicator.add(vacancy)
+    unique_vacancies = deduplicator.filter(new_vacancies)
+    added = add_new_vacancies(storage_class(unique_vacancies, file_path))
+    # The searches are marked as done only once their vacancies are stored, otherwise the next update repeats them
+    for api, data in fetched:
+        api.commit_new_vacancies(name, salary, data)
+
+    print(f'New vacancies found: {len(new_vacancies)}, added to the file: {added}')
+
+
+def choose_storage(question):
+    """Function for choosing the storage format to save vacancies in"""
+
+    formats = ', '.join(f'{number} - {storage[0]}' for number, storage in enumerate(storages, 1))
+    file_format = int(input(f'{question}\n {formats}: '))
+
+    if file_format not in range(1, len(storages) + 1):
+        print(f"Incorrect choice of format. Please choose a number from 1 to {len(storages)}.")
+        return None, None, None
 
-    if file_format == 1:
-        json_save.save_to_file()
+    return storages[file_format - 1]
 
-    elif file_format == 2:
-        csv_save.save_to_file()
+
+def get_storage(vacancies):
+    """Function for getting the storage of the first existing file with vacancies"""
+
+    for storage_name, storage_class, file_path in storages:
+        if os.path.isfile(file_path):
+            return storage_name, storage_class(vacancies, file_path)
+
+    print('There is no file with vacancies')
+    return None, None
+
+
+def save_vacancies(vacancies):
+    """Function for saving vacancies to a file"""
+
+    storage_name, storage_class, file_path = choose_storage('In what format do you want to save the file?')
+    if storage_class is None:
+        return
+    storage_class(vacancies, file_path).save_to_file()
 
     print(f'the file was successfully saved along the path: ../job_parser/saved_vacancies/')
 
@@ -65,106 +148,70 @@ def save_vacancies(vacancies):
 def remove_vacancies(vacancies):
     """Function for deleting a vacancy from a file"""
 
-    json_save = JsonSaver(vacancies, f'../job_parser/saved_vacancies/json_vacancies.json')
-    csv_save = CSVSaver(vacancies, f'../job_parser/saved_vacancies/csv_vacancies.csv')
-
     remove_vac = input('Enter the exact name of the vacancy to delete: ')
 
-    if os.path.isfile(file_path_json):
-        json_save.delete_vacancy(remove_vac)
-        print('the vacancy was successfully deleted from the JSON file')
-
-    elif os.path.isfile(file_path_csv):
-        csv_save.delete_vacancy(remove_vac)
-        print('the vacancy was successfully deleted from the CSV file')
-
-    else:
-        print('There is no file with vacancies')
+    storage_name, storage = get_storage(vacancies)
+    if storage is not None:
+        storage.delete_vacancy(remove_vac)
+        print(f'the vacancy was successfully deleted from the {storage_name} file')
 
 
 def get_vac_by_salary(vacancies):
     """Function for getting a vacancy based on salary"""
 
-    json_save = JsonSaver(vacancies, f'../job_parser/saved_vacancies/json_vacancies.json')
-    csv_save = CSVSaver(vacancies, f'../job_parser/saved_vacancies/csv_vacancies.csv')
-
     vac_by_sal = int(input('Enter salary to get vacancies: '))
 
-    if os.path.isfile(file_path_json):
-        vac_sal = json_save.get_vacancies_by_salary(vac_by_sal)
-        for vac in vac_sal:
+    storage_name, storage = get_storage(vacancies)
+    if storage is not None:
+        for vac in storage.get_vacancies_by_salary(vac_by_sal):
             print(vac)
 
-    elif os.path.isfile(file_path_csv):
-        vac_sal = csv_save.get_vacancies_by_salary(vac_by_sal)
-        for vac in vac_sal:
-            print(vac)
-
-    else:
-        print('There is no file with vacancies')
-
 
 def get_vac_by_city(vacancies):
     """Function for getting a vacancy based on the city"""
 
-    json_save = JsonSaver(vacancies, f'../job_parser/saved_vacancies/json_vacancies.json')
-    csv_save = CSVSaver(vacancies, f'../job_parser/saved_vacancies/csv_vacancies.csv')
-
     vac_by_city = input('Enter the name city to get vacancies: ')
 
-    if os.path.isfile(file_path_json):
-        vac_city = json_save.get_vacancies_by_city(vac_by_city)
-        for vac in vac_city:
+    storage_name, storage = get_storage(vacancies)
+    if storage is not None:
+        for vac in storage.get_vacancies_by_city(vac_by_city):
             print(vac)
 
-    elif os.path.isfile(file_path_csv):
-        vac_city = csv_save.get_vacancies_by_city(vac_by_city)
-        for vac in vac_city:
-            print(vac)
 
-    else:
-        print('There is no file with vacancies')
+def search_saved_vacancies(vacancies):
+    """Function for searching vacancies in a file by words in the title and requirements"""
+
+    query = input('Enter the words to search for: ')
+    match_all = input('Find vacancies with all words (1) or with any of them (2)? ') != '2'
+
+    storage_name, storage = get_storage(vacancies)
+    if storage is not None:
+        for vac in search_vacancies(storage, query, match_all):
+            print(vac)
 
 
 def get_top_vac(vacancies):
     """Function for getting top N vacancies"""
 
-    json_save = JsonSaver(vacancies, f'../job_parser/saved_vacancies/json_vacancies.json')
-    csv_save = CSVSaver(vacancies, f'../job_parser/saved_vacancies/csv_vacancies.csv')
-
     top_num = int(input(
         'Enter the number of vacancies to display the top N vacancies\n'
         'If you enter a number greater than the vacancies in the file, all vacancies will be displayed:\n'))
+    ranking = int(input('Rank vacancies by: 1 - average salary, 2 - salary from, 3 - salary to: '))
 
-    if os.path.isfile(file_path_json):
-        vac_top = json_save.top_vacancies(top_num)
-        for vac in vac_top:
-            print(vac)
+    if ranking not in [1, 2, 3]:
+        print("Incorrect choice of ranking. Please choose 1, 2 or 3.")
+        return
 
-    elif os.path.isfile(file_path_csv):
-        vac_top = csv_save.top_vacancies(top_num)
-        for vac in vac_top:
+    storage_name, storage = get_storage(vacancies)
+    if storage is not None:
+        for vac in storage.top_vacancies(top_num, RANKING_KEYS[ranking - 1]):
             print(vac)
 
-    else:
-        print('There is no file with vacancies')
-
 
 def get_all_vacancies(vacancies):
     """Function for getting all vacancies"""
 
-    json_save = JsonSaver(vacancies, f'../job_parser/saved_vacancies/json_vacancies.json')
-    csv_save = CSVSaver(vacancies, f'../job_parser/saved_vacancies/csv_vacancies.csv')
-
-    if os.path.isfile(file_path_json):
-        vac_all = json_save.load_from_file()
-        for vac in vac_all:
-            print(vac)
-
-    elif os.path.isfile(file_path_csv):
-        vac_all = csv_save.load_from_file()
-        for vac in vac_all:
+    storage_name, storage = get_storage(vacancies)
+    if storage is not None:
+        for vac in storage.load_from_file():
             print(vac)
-
-    else:
-        print('There is no file with vacancies')